@@ -1,17 +1,31 @@
 import os
 import sys
+import atexit
 import json
+import io
+import functools
+import operator
 import urllib.parse
+import urllib.request
 import subprocess
+import shutil
+import pathlib
 import string
 import random
+import re
 import hashlib
+import array
+import bisect
+import mmap
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from fuzzywuzzy import process
+from rapidfuzz import process, fuzz, utils
 import socket
+import queue
 import time
 import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 try:
     from PIL import Image, ImageTk
@@ -25,25 +39,141 @@ try:
 except ImportError:
     MUTAGEN_AVAILABLE = False
 
+try:
+    import fitz
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
 THUMBNAIL_FOLDER = os.path.join("playlists", "thumbnails")
 os.makedirs(THUMBNAIL_FOLDER, exist_ok=True)
 THUMBNAIL_SIZE = (200, 150)
+THUMB_CACHE_MAX = 256
+THUMB_PREFETCH_NEIGHBORS = 3
+TREE_BATCH_SIZE = 500
+VIDEO_THUMBNAIL_SEEKS = ("00:00:30", "00:00:05")
+FFMPEG_BATCH_SIZE = 16
+DOWNLOAD_WORKERS = 8
+VIDEO_TYPES = ("MKV", "MP4", "AVI", "Video")
+VIDEO_EXTENSIONS = (".mkv", ".mp4", ".avi", ".webm", ".mov")
+AUDIO_EXTENSIONS = (".mp3", ".flac", ".ogg", ".m4a", ".wma", ".aac", ".aif", ".aiff")
+# Library type for a playlist's first entry, keyed by lower-cased extension without the dot
+_EXT_TO_TYPE = {"mkv": "MKV", "mp4": "MP4", "avi": "AVI", "aif": "Music", "aiff": "Music"}
 
 MAX_FILENAME_LENGTH = 215
+# Larger chunks for shutil's read/write fallback when no sendfile fast path applies
+shutil.COPY_BUFSIZE = 4 * 1024 * 1024
 VALID_CHARS = f"-_.() {string.ascii_letters}{string.digits}"
 
+# One M3U line: skips comments, captures the entry without an optional file:/// prefix
+_M3U_ENTRY_RE = re.compile(r"(?!\s*#)\s*(?:file:///)?(.*?)\s*", re.IGNORECASE | re.DOTALL)
+_M3U_SUFFIX_RE = re.compile(r"\.m3u\Z", re.IGNORECASE)
+# "file:///" or "file:\" at the start of a playlist entry
+_FILE_URL_PREFIX_RE = re.compile(r"file:(?:///|\\)", re.IGNORECASE)
+
+class _SanitizeTable(dict):
+    """str.translate table that keeps VALID_CHARS and drops everything else.
+
+    Invalid code points are added on first sight, so repeated lookups stay in C
+    without building a table for the whole Unicode range up front.
+    """
+    def __missing__(self, codepoint):
+        self[codepoint] = None
+        return None
+
+_SANITIZE_TABLE = _SanitizeTable((ord(c), c) for c in VALID_CHARS)
+
+def sanitize_playlist_name(name):
+    return name.translate(_SANITIZE_TABLE).strip()
+
+def write_file_atomic(path, payload):
+    """Write bytes to path through a temp file and os.replace, so a crash never leaves it half-written."""
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def _file_has_content(path, payload):
+    """True if path already holds exactly payload (size is checked before reading)."""
+    try:
+        if os.stat(path).st_size != len(payload):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == payload
+    except OSError:
+        return False
+
+def write_playlist_files(playlists, max_workers=16):
+    """Write a {path: payload} dict of playlists concurrently with write_file_atomic.
+
+    Playlists already on disk with the same bytes are left untouched, so a rescan
+    only rewrites what changed. Returns (path, error) pairs in the dict's order;
+    error is None on success.
+    """
+    # One listing per destination folder tells which playlists exist, instead of a stat each
+    existing = {}
+    for folder in {os.path.dirname(path) for path in playlists}:
+        try:
+            existing[folder] = set(os.listdir(folder or "."))
+        except OSError:
+            existing[folder] = set()
+
+    def write(item):
+        path, payload = item
+        try:
+            folder, name = os.path.split(path)
+            if name not in existing[folder] or not _file_has_content(path, payload):
+                write_file_atomic(path, payload)
+        except OSError as e:
+            return path, e
+        return path, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(write, playlists.items()))
+
+@functools.lru_cache(maxsize=65536)
+def file_uri(abs_path):
+    """Percent-encode an absolute path as a file:/// playlist entry (memoized across scans)."""
+    return f"file:///{urllib.parse.quote(abs_path)}"
+
 if sys.platform == "win32":
     VLC_PATH = r"C:\Program Files\VideoLAN\VLC\vlc.exe"
 else:
     VLC_PATH = "vlc"
 
+# On Windows, close_fds=True makes CreateProcess build an explicit handle list; nothing here needs it
+_POPEN_KWARGS = {"close_fds": False} if sys.platform == "win32" else {}
+
+def start_process(cmd):
+    """Launch cmd without waiting for it, so the Tk main loop keeps running."""
+    return subprocess.Popen(cmd, **_POPEN_KWARGS)
+
 def open_file_with_default_app(filepath):
     if sys.platform == "win32":
         os.startfile(filepath)
     elif sys.platform == "darwin":
-        subprocess.run(["open", filepath])
+        start_process(["open", filepath])
     else:
-        subprocess.run(["xdg-open", filepath])
+        start_process(["xdg-open", filepath])
 
 PLAYLIST_FOLDER = "playlists"
 os.makedirs(PLAYLIST_FOLDER, exist_ok=True)
@@ -60,22 +190,59 @@ def load_config():
             "music": []
         }
     }
+    config = default_config
     if os.path.exists(CONFIG_FILE):
         try:
             with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+                config = json.load(f)
         except:
             pass
-    return default_config
+
+    # Folder lists are held as insertion-ordered dicts for O(1) membership; save_config writes lists
+    scan_folders = config.setdefault("scan_folders", {})
+    for folder_type in default_config["scan_folders"]:
+        scan_folders[folder_type] = dict.fromkeys(scan_folders.get(folder_type) or ())
+    return config
 
 def save_config(config):
+    config = dict(config)
+    config["scan_folders"] = {folder_type: list(folders)
+                              for folder_type, folders in config.get("scan_folders", {}).items()}
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         json.dump(config, f, indent=2)
 
 def get_thumbnail_path(media_path):
-    path_hash = hashlib.md5(media_path.encode()).hexdigest()
+    # Only needs to be unique per path, not cryptographically strong
+    if XXHASH_AVAILABLE:
+        path_hash = xxhash.xxh3_64_hexdigest(media_path)
+    else:
+        path_hash = hashlib.blake2b(media_path.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
     return os.path.join(THUMBNAIL_FOLDER, f"{path_hash}.png")
 
+def _thumbnail_temp_path(thumb_path):
+    """Per-thread scratch name beside thumb_path; keeps the .png suffix the renderers key on."""
+    return f"{thumb_path[:-len('.png')]}.{threading.get_ident()}.tmp.png"
+
+def _discard_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _publish_thumbnail(tmp_path, thumb_path):
+    """Move a finished render into place with os.replace, so readers never see a half-written PNG.
+
+    Returns thumb_path, or None (removing the scratch file) if nothing usable was rendered.
+    """
+    try:
+        if os.path.getsize(tmp_path) > 0:
+            os.replace(tmp_path, thumb_path)
+            return thumb_path
+    except OSError:
+        pass
+    _discard_file(tmp_path)
+    return None
+
 def extract_video_thumbnail(video_path):
     if not os.path.exists(video_path):
         return None
@@ -84,33 +251,21 @@ def extract_video_thumbnail(video_path):
     if os.path.exists(thumb_path):
         return thumb_path
 
-    try:
+    tmp_path = _thumbnail_temp_path(thumb_path)
+    for seek in VIDEO_THUMBNAIL_SEEKS:
         cmd = [
             "ffmpeg", "-i", video_path,
-            "-ss", "00:00:30",
+            "-ss", seek,
             "-vframes", "1",
             "-vf", f"scale={THUMBNAIL_SIZE[0]}:{THUMBNAIL_SIZE[1]}:force_original_aspect_ratio=decrease",
-            "-y", thumb_path
+            "-y", tmp_path
         ]
-        result = subprocess.run(cmd, capture_output=True, timeout=30)
-        if os.path.exists(thumb_path):
-            return thumb_path
-    except:
-        pass
-
-    try:
-        cmd = [
-            "ffmpeg", "-i", video_path,
-            "-ss", "00:00:05",
-            "-vframes", "1",
-            "-vf", f"scale={THUMBNAIL_SIZE[0]}:{THUMBNAIL_SIZE[1]}:force_original_aspect_ratio=decrease",
-            "-y", thumb_path
-        ]
-        subprocess.run(cmd, capture_output=True, timeout=30)
-        if os.path.exists(thumb_path):
+        try:
+            subprocess.run(cmd, capture_output=True, stdin=subprocess.DEVNULL, timeout=30)
+        except (OSError, subprocess.SubprocessError):
+            pass
+        if _publish_thumbnail(tmp_path, thumb_path):
             return thumb_path
-    except:
-        pass
 
     return None
 
@@ -125,6 +280,7 @@ def extract_audio_thumbnail(audio_path):
     if os.path.exists(thumb_path):
         return thumb_path
 
+    tmp_path = _thumbnail_temp_path(thumb_path)
     try:
         audio = MutagenFile(audio_path)
         if audio is None:
@@ -144,13 +300,12 @@ def extract_audio_thumbnail(audio_path):
                 artwork = bytes(audio.tags['covr'][0])
 
         if artwork:
-            import io
             img = Image.open(io.BytesIO(artwork))
             img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-            img.save(thumb_path, "PNG")
-            return thumb_path
+            img.save(tmp_path, "PNG")
+            return _publish_thumbnail(tmp_path, thumb_path)
     except:
-        pass
+        _discard_file(tmp_path)
 
     return None
 
@@ -162,44 +317,311 @@ def extract_pdf_thumbnail(pdf_path):
     if os.path.exists(thumb_path):
         return thumb_path
 
+    tmp_path = _thumbnail_temp_path(thumb_path)
+
+    # Render in-process with MuPDF when available; it releases the GIL, so this scales across threads
+    if FITZ_AVAILABLE:
+        try:
+            with fitz.open(pdf_path) as doc:
+                page = doc.load_page(0)
+                # Same sizing as pdftoppm -scale-to: the long side becomes THUMBNAIL_SIZE[0]
+                zoom = THUMBNAIL_SIZE[0] / max(page.rect.width, page.rect.height)
+                page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)).save(tmp_path)
+            if _publish_thumbnail(tmp_path, thumb_path):
+                return thumb_path
+        except Exception:
+            _discard_file(tmp_path)
+
+    # pdftoppm appends the page number to the output root it is given
+    tmp_root = tmp_path[:-len(".png")]
     try:
         cmd = [
             "pdftoppm", "-png", "-f", "1", "-l", "1",
             "-scale-to", str(THUMBNAIL_SIZE[0]),
-            pdf_path, thumb_path.replace(".png", "")
+            pdf_path, tmp_root
         ]
-        subprocess.run(cmd, capture_output=True, timeout=30)
-        generated = thumb_path.replace(".png", "-1.png")
-        if os.path.exists(generated):
-            os.rename(generated, thumb_path)
-            return thumb_path
-    except:
+        subprocess.run(cmd, capture_output=True, stdin=subprocess.DEVNULL, timeout=30)
+    except (OSError, subprocess.SubprocessError):
         pass
+    return _publish_thumbnail(f"{tmp_root}-1.png", thumb_path)
 
-    return None
+def _run_ffmpeg_thumbnail_batch(jobs, seek):
+    """Render one frame at seek for every (video_path, thumb_path) job using a single ffmpeg process.
+
+    Outputs go to scratch files and are only published when ffmpeg exits cleanly, so a
+    killed or timed-out batch never leaves a partial PNG at a thumbnail path. Returns the
+    set of video paths whose thumbnail was published, or None if ffmpeg failed outright,
+    e.g. because one input could not be opened.
+    """
+    tmp_paths = [_thumbnail_temp_path(thumb_path) for _, thumb_path in jobs]
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y"]
+    for video_path, _ in jobs:
+        cmd += ["-ss", seek, "-i", video_path]
+    for index, tmp_path in enumerate(tmp_paths):
+        cmd += [
+            "-map", f"{index}:v:0",
+            "-frames:v", "1",
+            "-vf", f"scale={THUMBNAIL_SIZE[0]}:{THUMBNAIL_SIZE[1]}:force_original_aspect_ratio=decrease",
+            tmp_path
+        ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, stdin=subprocess.DEVNULL, timeout=30 * len(jobs))
+        ok = result.returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        ok = False
+
+    published = set()
+    for (video_path, thumb_path), tmp_path in zip(jobs, tmp_paths):
+        if not ok:
+            _discard_file(tmp_path)
+        elif _publish_thumbnail(tmp_path, thumb_path):
+            published.add(video_path)
+    return published if ok else None
+
+def batch_extract_video_thumbnails(paths):
+    """Extract thumbnails for many videos, sharing one ffmpeg process per batch.
+
+    Tries each seek in VIDEO_THUMBNAIL_SEEKS in turn, re-running only the videos
+    that produced no frame. Videos from a batch ffmpeg rejected outright (e.g.
+    one unreadable input), and any still missing at the end, fall back to
+    get_thumbnail. Returns a dict mapping each path to its thumbnail path (or None).
+    """
+    results = {}
+    pending = []
+    for video_path in dict.fromkeys(paths):
+        thumb_path = get_thumbnail_path(video_path)
+        if os.path.exists(thumb_path):
+            results[video_path] = thumb_path
+        elif os.path.exists(video_path):
+            pending.append((video_path, thumb_path))
+        else:
+            results[video_path] = None
+
+    fallback = []
+    for seek in VIDEO_THUMBNAIL_SEEKS:
+        if not pending:
+            break
+        failed = set()
+        rendered = set()
+        for start in range(0, len(pending), FFMPEG_BATCH_SIZE):
+            batch = pending[start:start + FFMPEG_BATCH_SIZE]
+            published = _run_ffmpeg_thumbnail_batch(batch, seek)
+            if published is None:
+                failed.update(video_path for video_path, _ in batch)
+            else:
+                rendered.update(published)
+
+        still_pending = []
+        for video_path, thumb_path in pending:
+            # A concurrent get_thumbnail may have published it in the meantime
+            if video_path in rendered or os.path.exists(thumb_path):
+                results[video_path] = thumb_path
+            elif video_path in failed:
+                fallback.append(video_path)
+            else:
+                still_pending.append((video_path, thumb_path))
+        pending = still_pending
+
+    # Through get_thumbnail, so the fallback takes the same per-path lock as other callers
+    fallback.extend(video_path for video_path, _ in pending)
+    for video_path in fallback:
+        results[video_path] = get_thumbnail(video_path, "Video")
+
+    return results
+
+_TYPE_HANDLER = dict.fromkeys(VIDEO_TYPES, extract_video_thumbnail)
+_TYPE_HANDLER["PDF"] = extract_pdf_thumbnail
+
+_EXT_HANDLER = {
+    **dict.fromkeys(VIDEO_EXTENSIONS, extract_video_thumbnail),
+    ".pdf": extract_pdf_thumbnail,
+    **dict.fromkeys(AUDIO_EXTENSIONS, extract_audio_thumbnail),
+}
+
+THUMBNAIL_CACHE_SIZE = 4096
+# Successful lookups only, so a failed render (e.g. an ffmpeg timeout) is retried next time
+_thumbnail_paths = OrderedDict()
+_thumbnail_paths_lock = threading.Lock()
+# Striped locks: a fixed pool, so memory doesn't grow with the number of media paths seen
+_thumbnail_locks = tuple(threading.Lock() for _ in range(64))
+
+def _thumbnail_lock(media_path):
+    """Lock serializing thumbnail generation for media_path (and the paths sharing its stripe)."""
+    return _thumbnail_locks[hash(media_path) % len(_thumbnail_locks)]
+
+def _thumbnail_handler(media_path, media_type):
+    handler = _TYPE_HANDLER.get(media_type)
+    ext_handler = _EXT_HANDLER.get(os.path.splitext(media_path)[1].lower())
+    # A video extension wins over the PDF type; otherwise the media type wins over the extension
+    if handler is None or ext_handler is extract_video_thumbnail:
+        handler = ext_handler
+    return handler
 
 def get_thumbnail(media_path, media_type):
     if not PIL_AVAILABLE:
         return None
 
-    ext = os.path.splitext(media_path)[1].lower()
+    key = (media_path, media_type)
+    with _thumbnail_paths_lock:
+        thumb_path = _thumbnail_paths.get(key)
+        if thumb_path is not None:
+            _thumbnail_paths.move_to_end(key)
+    # A thumbnail deleted from disk since is regenerated below
+    if thumb_path is not None and os.path.exists(thumb_path):
+        return thumb_path
+
+    handler = _thumbnail_handler(media_path, media_type)
+    if handler is None:
+        return None
+
+    # The prefetch worker and the Tk thread can ask for the same path at once. The second
+    # caller waits here and then finds the finished thumbnail instead of rendering it again.
+    with _thumbnail_lock(media_path):
+        thumb_path = handler(media_path)
 
-    if media_type in ("MKV", "MP4", "AVI", "Video") or ext in (".mkv", ".mp4", ".avi", ".webm", ".mov"):
-        return extract_video_thumbnail(media_path)
-    elif media_type == "PDF" or ext == ".pdf":
-        return extract_pdf_thumbnail(media_path)
-    elif ext in (".mp3", ".flac", ".ogg", ".m4a", ".wma", ".aac", ".aif", ".aiff"):
-        return extract_audio_thumbnail(media_path)
+    if thumb_path is not None:
+        with _thumbnail_paths_lock:
+            _thumbnail_paths[key] = thumb_path
+            _thumbnail_paths.move_to_end(key)
+            if len(_thumbnail_paths) > THUMBNAIL_CACHE_SIZE:
+                _thumbnail_paths.popitem(last=False)
+    return thumb_path
 
-    return None
+def batch_generate_thumbnails(items, max_workers=os.cpu_count()):
+    """Generate thumbnails for (media_path, media_type) pairs on a thread pool.
+
+    Returns a dict mapping each media path to its thumbnail path (or None).
+    """
+    if not PIL_AVAILABLE:
+        return {}
+
+    # One job per path, so two workers never render the same thumbnail file
+    unique_items = dict(items)
+
+    # Videos are rendered in shared ffmpeg processes; only the rest go through the pool
+    video_paths = [path for path, media_type in unique_items.items()
+                   if _thumbnail_handler(path, media_type) is extract_video_thumbnail]
+    results = batch_extract_video_thumbnails(video_paths) if video_paths else {}
+
+    others = {path: media_type for path, media_type in unique_items.items() if path not in results}
+    if others:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results.update(zip(others.keys(), executor.map(get_thumbnail, others.keys(), others.values())))
+    return results
 
 HISTORY_AUDIO = os.path.join(PLAYLIST_FOLDER, "history.m3u")
 HISTORY_VIDEO = os.path.join(PLAYLIST_FOLDER, "history2.m3u")
 PDF_HISTORY_FILE = os.path.join(PLAYLIST_FOLDER, "pdf_history.txt")
 PDF_OPENED_HISTORY_FILE = os.path.join(PLAYLIST_FOLDER, "pdf_opened_history.txt")
 SEARCH_HISTORY_FILE = os.path.join(PLAYLIST_FOLDER, "search_history.txt")
+SCAN_INDEX_FILE = os.path.join(PLAYLIST_FOLDER, "scan_index.json")
+
+def iter_files_with_ext(root, exts):
+    """Yield paths of files under root whose names end with exts (case-insensitive).
+
+    Walks top-down in the same order as os.walk, but uses the d_type cached by
+    os.scandir so no extra stat is needed per entry. Unreadable directories are
+    skipped, as os.walk does. Only the last few characters of each name are
+    lowercased, not the whole name.
+    """
+    if isinstance(exts, str):
+        exts = (exts,)
+    tail = max(len(ext) for ext in exts)
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name[-tail:].lower().endswith(exts):
+                        yield entry.path
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+
+_scan_index_lock = threading.Lock()
+
+def _load_scan_index(index_path):
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+def scan_files_parallel(root, exts, max_workers=8, index_path=SCAN_INDEX_FILE):
+    """Return the same paths as iter_files_with_ext, scanning directories on a thread pool.
+
+    Each worker lists one directory and queues its subdirectories itself, so
+    slow (network) mounts are read concurrently. Results are stitched back
+    together in os.walk order.
+
+    Directory listings are remembered in index_path together with each
+    directory's mtime; a directory whose mtime has not changed since the last
+    scan costs one stat instead of a full listing. Pass index_path=None to
+    always list.
+    """
+    if isinstance(exts, str):
+        exts = (exts,)
+    tail = max(len(ext) for ext in exts)
+    old_index = _load_scan_index(index_path) if index_path else {}
+    seen = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def scan(path):
+            try:
+                # Stat before listing, so a change made mid-listing is picked up next time
+                mtime = os.stat(path).st_mtime_ns
+                cached = old_index.get(path)
+                if cached and cached[0] == mtime:
+                    file_names, dir_names = cached[1], cached[2]
+                else:
+                    file_names, dir_names = [], []
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            if entry.is_dir(follow_symlinks=False):
+                                dir_names.append(entry.name)
+                            else:
+                                file_names.append(entry.name)
+            except OSError:
+                return [], []
+            seen[path] = [mtime, file_names, dir_names]
+            subdirs = [executor.submit(scan, os.path.join(path, name)) for name in dir_names]
+            files = [os.path.join(path, name) for name in file_names
+                     if name[-tail:].lower().endswith(exts)]
+            return files, subdirs
+
+        result = []
+        pending = [executor.submit(scan, root)]
+        while pending:
+            files, subdirs = pending.pop().result()
+            result.extend(files)
+            pending.extend(reversed(subdirs))
+
+    if index_path:
+        # Replace everything under root with what this walk saw; other roots are kept
+        prefix = os.path.join(root, "")
+        stale = [path for path in old_index
+                 if (path == root or path.startswith(prefix)) and path not in seen]
+        if stale or any(old_index.get(path) != listing for path, listing in seen.items()):
+            with _scan_index_lock:
+                # Re-read so a scan of another root that finished meanwhile is kept
+                index = _load_scan_index(index_path)
+                for path in stale:
+                    index.pop(path, None)
+                index.update(seen)
+                try:
+                    write_file_atomic(index_path, json.dumps(index).encode("utf-8"))
+                except OSError as e:
+                    print(f"Failed to save scan index: {e}")
+    return result
 
 class MKVPlaylistGenerator:
+    __slots__ = ("video_source_dir", "playlist_dest_dir")
+
     def __init__(self):
         self.video_source_dir = ""
         self.playlist_dest_dir = PLAYLIST_FOLDER
@@ -208,7 +630,7 @@ class MKVPlaylistGenerator:
         self.video_source_dir = video_source_dir
 
     def sanitize_playlist_name(self, name):
-        return ''.join(c for c in name if c in VALID_CHARS).strip()
+        return sanitize_playlist_name(name)
 
     def create_mkv_playlists(self):
         try:
@@ -219,30 +641,27 @@ class MKVPlaylistGenerator:
             if not os.path.exists(self.playlist_dest_dir):
                 os.makedirs(self.playlist_dest_dir)
 
-            mkv_files = []
-            for root, _, files in os.walk(self.video_source_dir):
-                for file in files:
-                    if file.lower().endswith(".mkv"):
-                        full_path = os.path.abspath(os.path.join(root, file))
-                        mkv_files.append(full_path)
+            mkv_files = list(iter_files_with_ext(os.path.abspath(self.video_source_dir), ".mkv"))
 
             if not mkv_files:
                 print("No MKV files found.")
                 return False
 
+            playlists = {}
             for file_path in mkv_files:
                 filename = os.path.splitext(os.path.basename(file_path))[0]
                 safe_name = self.sanitize_playlist_name(filename)
                 safe_name = safe_name[:MAX_FILENAME_LENGTH - len(".m3u")]
                 playlist_path = os.path.join(self.playlist_dest_dir, f"{safe_name}.m3u")
 
-                encoded_path = urllib.parse.quote(file_path)
-                playlist_entry = f"file:///{encoded_path}"
-
-                with open(playlist_path, "w", encoding="utf-8") as f:
-                    f.write(f"# Movie: {filename}\n")
-                    f.write(f"{playlist_entry}\n")
+                playlist_entry = file_uri(file_path)
+                # Later files with the same sanitized name win, as with sequential writes
+                playlists.pop(playlist_path, None)
+                playlists[playlist_path] = f"# Movie: {filename}\n{playlist_entry}\n".encode("utf-8")
 
+            for playlist_path, error in write_playlist_files(playlists):
+                if error is not None:
+                    raise error
                 print(f"Written MKV playlist: {playlist_path}")
 
             return True
@@ -256,12 +675,7 @@ def create_mp4_playlists(folder, playlist_dest):
     if not folder or not os.path.isdir(folder):
         return False
 
-    mp4_files = []
-    for root, _, files in os.walk(folder):
-        for file in files:
-            if file.lower().endswith(".mp4"):
-                full_path = os.path.abspath(os.path.join(root, file))
-                mp4_files.append(full_path)
+    mp4_files = list(iter_files_with_ext(os.path.abspath(folder), ".mp4"))
 
     if not mp4_files:
         return False
@@ -269,22 +683,24 @@ def create_mp4_playlists(folder, playlist_dest):
     if not os.path.exists(playlist_dest):
         os.makedirs(playlist_dest)
 
+    playlists = {}
+    sources = {}
     for file_path in mp4_files:
         filename = os.path.splitext(os.path.basename(file_path))[0]
-        safe_name = ''.join(c for c in filename if c in VALID_CHARS).strip()
+        safe_name = sanitize_playlist_name(filename)
         safe_name = safe_name[:MAX_FILENAME_LENGTH - len(".m3u")]
         playlist_path = os.path.join(playlist_dest, f"{safe_name}.m3u")
 
-        encoded_path = urllib.parse.quote(file_path)
-        playlist_entry = f"file:///{encoded_path}"
+        playlist_entry = file_uri(file_path)
+        playlists.pop(playlist_path, None)
+        playlists[playlist_path] = f"# Movie: {filename}\n{playlist_entry}\n".encode("utf-8")
+        sources[playlist_path] = file_path
 
-        try:
-            with open(playlist_path, "w", encoding="utf-8") as f:
-                f.write(f"# Movie: {filename}\n")
-                f.write(f"{playlist_entry}\n")
+    for playlist_path, error in write_playlist_files(playlists):
+        if error is None:
             print(f"Written MP4 playlist: {playlist_path}")
-        except Exception as e:
-            print(f"Failed to write playlist for {file_path}: {e}")
+        else:
+            print(f"Failed to write playlist for {sources[playlist_path]}: {error}")
 
     return True
 
@@ -298,76 +714,126 @@ def create_music_playlists(folder, playlist_dest):
     if not os.path.exists(playlist_dest):
         os.makedirs(playlist_dest)
 
-    def write_playlist(name, songs, prefix="# Playlist"):
-        """Helper function to write a .m3u playlist file."""
-        safe_name = ''.join(c for c in name if c in VALID_CHARS).strip()
+    def encode_entry(song_path):
+        """Encode one song as a ready-to-write playlist line."""
+        return f"{file_uri(os.path.abspath(song_path))}\n".encode("ascii")
+
+    def write_playlist(name, entries, prefix="# Playlist", start=0):
+        """Helper function to write a .m3u playlist file from pre-encoded entry bytes.
+
+        A non-zero start rotates the entries so the playlist begins at that byte offset.
+        """
+        safe_name = sanitize_playlist_name(name)
         if not safe_name:
             safe_name = "playlist_" + hashlib.md5(name.encode()).hexdigest()[:8]
 
         safe_name = safe_name[:MAX_FILENAME_LENGTH - len(".m3u")]
         playlist_path = os.path.join(playlist_dest, f"{safe_name}.m3u")
 
+        payload = f"# {prefix}: {name}\n".encode("utf-8") + entries[start:] + entries[:start]
         try:
-            with open(playlist_path, "w", encoding="utf-8") as f:
-                f.write(f"# {prefix}: {name}\n")
-                for song_path in songs:
-                    abs_song_path = os.path.abspath(song_path)
-                    encoded_path = urllib.parse.quote(abs_song_path)
-                    f.write(f"file:///{encoded_path}\n")
+            write_file_atomic(playlist_path, payload)
             print(f"Written playlist: {playlist_path}")
         except Exception as e:
             print(f"Failed to write playlist for {name}: {e}")
 
     found_music = False
-    for artist_name in os.listdir(folder):
-        artist_path = os.path.join(folder, artist_name)
-        if not os.path.isdir(artist_path):
-            continue
+    with os.scandir(folder) as artist_entries:
+        artist_dirs = [(e.name, e.path) for e in artist_entries if e.is_dir()]
 
-        all_artist_songs = []
-        for album_name in os.listdir(artist_path):
-            album_path = os.path.join(artist_path, album_name)
-            if not os.path.isdir(album_path):
-                continue
+    for artist_name, artist_path in artist_dirs:
+        with os.scandir(artist_path) as album_entries:
+            album_dirs = [(e.name, e.path) for e in album_entries if e.is_dir()]
 
-            album_songs = []
-            for song_file in os.listdir(album_path):
-                if song_file.lower().endswith(('.aif', '.aiff')):
-                    found_music = True
-                    song_path = os.path.join(album_path, song_file)
-                    album_songs.append(song_path)
+        all_artist_songs = []
+        for album_name, album_path in album_dirs:
+            with os.scandir(album_path) as song_entries:
+                album_songs = [e.path for e in song_entries if e.name[-5:].lower().endswith(('.aif', '.aiff'))]
 
             if album_songs:
+                found_music = True
                 album_songs.sort()
-                for i, song_path in enumerate(album_songs):
+                # Encode each song once; the song, album and artist playlists all reuse it
+                encoded_lines = [encode_entry(song_path) for song_path in album_songs]
+                album_entries = b"".join(encoded_lines)
+                offset = 0
+                for song_path, line in zip(album_songs, encoded_lines):
                     song_title = os.path.splitext(os.path.basename(song_path))[0]
-                    rotated_songs = album_songs[i:] + album_songs[:i]
-                    write_playlist(song_title, rotated_songs, prefix="# Song")
+                    write_playlist(song_title, album_entries, prefix="# Song", start=offset)
+                    offset += len(line)
 
                 album_playlist_name = f"{artist_name} - {album_name}"
-                write_playlist(album_playlist_name, album_songs, prefix="# Album")
-                all_artist_songs.extend(album_songs)
+                write_playlist(album_playlist_name, album_entries, prefix="# Album")
+                all_artist_songs.extend(zip(album_songs, encoded_lines))
 
         if all_artist_songs:
             all_artist_songs.sort()
-            write_playlist(artist_name, all_artist_songs, prefix="# Artist")
+            write_playlist(artist_name, b"".join(line for _, line in all_artist_songs), prefix="# Artist")
 
     return True
 
-def log_pdf_opened(pdf_path):
-    """Log PDF path to opened PDFs history file (avoid duplicates)."""
+def _mtime_or_none(path):
     try:
-        if not os.path.exists(PDF_OPENED_HISTORY_FILE):
-            with open(PDF_OPENED_HISTORY_FILE, "w", encoding="utf-8") as f:
-                f.write(pdf_path + "\n")
-            return
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
 
-        with open(PDF_OPENED_HISTORY_FILE, "r", encoding="utf-8") as f:
-            lines = set(line.strip() for line in f if line.strip())
+# Views derived from history files (line sets, normalized entries, line offsets), per path,
+# as (mtime they match, {view name: value})
+_history_cache = {}
+_history_write_lock = threading.Lock()
 
-        if pdf_path not in lines:
+def _history_view(history_path, view, build):
+    """Return the named view of history_path, calling build(history_path) only when the file changed.
+
+    Every view of a file is keyed on the same mtime, so a change made outside this
+    process drops them all at once.
+    """
+    mtime = _mtime_or_none(history_path)
+    cached = _history_cache.get(history_path)
+    if cached is None or cached[0] != mtime:
+        cached = _history_cache[history_path] = (mtime, {})
+    views = cached[1]
+    if view not in views:
+        views[view] = build(history_path)
+    return views[view]
+
+def _remember_history_append(history_path, view, items):
+    """Fold items we just appended to history_path into a cached set view, without a re-read.
+
+    The other views of the file no longer match its contents and are dropped.
+    """
+    cached = _history_cache.get(history_path)
+    if cached is None or view not in cached[1]:
+        return
+    value = cached[1][view]
+    value.update(items)
+    _history_cache[history_path] = (_mtime_or_none(history_path), {view: value})
+
+def _read_history_lines(history_path):
+    try:
+        with open(history_path, "r", encoding="utf-8") as f:
+            lines = set(map(str.strip, f.read().splitlines()))
+    except FileNotFoundError:
+        return set()
+    lines.discard("")
+    return lines
+
+def get_history_set(history_path):
+    """Return the set of stripped, non-blank lines in history_path."""
+    return _history_view(history_path, "lines", _read_history_lines)
+
+def remember_history_lines(history_path, lines):
+    """Add lines we just appended to history_path to its cached set, without a re-read."""
+    _remember_history_append(history_path, "lines", lines)
+
+def log_pdf_opened(pdf_path):
+    """Log PDF path to opened PDFs history file (avoid duplicates)."""
+    try:
+        if pdf_path not in get_history_set(PDF_OPENED_HISTORY_FILE):
             with open(PDF_OPENED_HISTORY_FILE, "a", encoding="utf-8") as f:
                 f.write(pdf_path + "\n")
+            remember_history_lines(PDF_OPENED_HISTORY_FILE, (pdf_path,))
     except Exception as e:
         print(f"Failed to log opened PDF: {e}")
 
@@ -378,28 +844,224 @@ def log_search_history(name):
     except:
         pass
 
-def search_and_open(query):
-    playlist_files = [f for f in os.listdir(PLAYLIST_FOLDER) if f.endswith(".m3u")]
-    playlist_titles = [os.path.splitext(f)[0] for f in playlist_files]
+def list_playlist_files():
+    """Return the .m3u file names in PLAYLIST_FOLDER.
+
+    Shares _title_index's listing, which is only rescanned when the folder's mtime changes.
+    """
+    return [f"{title}.m3u" for title in _title_index.refresh().playlist_titles]
+
+PLAYLIST_META_FILE = os.path.join(PLAYLIST_FOLDER, ".playlist_meta.json")
+_playlist_meta = None
 
-    pdf_files = []
-    if os.path.exists(PDF_HISTORY_FILE):
-        with open(PDF_HISTORY_FILE, "r", encoding="utf-8") as f:
-            pdf_paths = [line.strip() for line in f if line.strip()]
-        pdf_files = [os.path.basename(p) for p in pdf_paths]
+def list_dir_names(folder):
+    """Return the entry names in folder as a set (empty if it cannot be read).
+
+    One readdir answers existence for every file in the folder, instead of a stat each.
+    """
+    try:
+        with os.scandir(folder or ".") as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
+PLAYLIST_HEADER_CHARS = 8192
+# First line that is a file:/// URI or any other non-comment entry, as it reads once stripped
+_PLAYLIST_ENTRY_RE = re.compile(r"^[ \t]*(?:file:///(.*?)|([^#\s].*?))[ \t\r]*$", re.MULTILINE)
+
+def parse_playlist_media(playlist_path):
+    """Return (media_path, media_type, artist, album) for the first entry of a playlist."""
+    media_path = ""
+    media_type = "Video"
+
+    try:
+        with open(playlist_path, "r", encoding="utf-8", errors="replace") as pf:
+            data = pf.read(PLAYLIST_HEADER_CHARS)
+            match = _PLAYLIST_ENTRY_RE.search(data)
+            # Only fall back to the whole file when the first entry isn't complete in the header
+            if len(data) == PLAYLIST_HEADER_CHARS and (match is None or match.end() == len(data)):
+                data += pf.read()
+                match = _PLAYLIST_ENTRY_RE.search(data)
+            if match is not None:
+                uri, line = match.groups()
+                if uri is not None:
+                    media_path = urllib.parse.unquote(uri)
+                    media_type = _EXT_TO_TYPE.get(media_path.rpartition(".")[2].lower(), "Video")
+                else:
+                    media_path = line
+    except OSError:
+        pass
+
+    artist = ""
+    album = ""
+    if media_type == "Music" and media_path:
+        # Only the last three components matter: .../artist/album/track
+        path_parts = media_path.replace("\\", "/").rsplit("/", 3)
+        if len(path_parts) >= 3:
+            album = path_parts[-2]
+            artist = path_parts[-3]
+
+    return media_path, media_type, artist, album
+
+def load_playlist_meta():
+    """Return {playlist file name: [mtime_ns, size, media_path, media_type, artist, album]}.
+
+    Loaded from PLAYLIST_META_FILE once per process; refresh_library only reparses
+    playlists whose (mtime_ns, size) no longer matches.
+    """
+    global _playlist_meta
+    if _playlist_meta is None:
+        try:
+            with open(PLAYLIST_META_FILE, "r", encoding="utf-8") as f:
+                _playlist_meta = json.load(f)
+            if not isinstance(_playlist_meta, dict):
+                _playlist_meta = {}
+        except (OSError, ValueError):
+            _playlist_meta = {}
+    return _playlist_meta
+
+def save_playlist_meta(meta):
+    global _playlist_meta
+    _playlist_meta = meta
+    try:
+        write_file_atomic(PLAYLIST_META_FILE, json.dumps(meta).encode("utf-8"))
+    except OSError as e:
+        print(f"Failed to save playlist metadata cache: {e}")
+
+LIBRARY_CACHE_FILE = os.path.join(PLAYLIST_FOLDER, ".library_cache.json")
+# Bump when the media item dicts built by MKVPlayerApp.collect_media_items change shape
+LIBRARY_CACHE_VERSION = 1
+
+def load_library_cache():
+    """Return the media items saved by the previous run, or None if there are none usable."""
+    try:
+        with open(LIBRARY_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get("version") != LIBRARY_CACHE_VERSION:
+        return None
+    items = cache.get("items")
+    return items if isinstance(items, list) else None
+
+def save_library_cache(items):
+    payload = json.dumps({"version": LIBRARY_CACHE_VERSION, "items": items})
+    try:
+        write_file_atomic(LIBRARY_CACHE_FILE, payload.encode("utf-8"))
+    except OSError as e:
+        print(f"Failed to save library cache: {e}")
+
+class _TitleIndex:
+    """Searchable playlist titles and PDF basenames, rebuilt only when the
+    playlist folder or the PDF history file changes on disk."""
+    def __init__(self):
+        self.playlist_titles = []
+        self.playlist_title_set = frozenset()
+        self.pdf_basename_to_path = {}
+        self.all_titles = []
+        self.title_by_lower = {}
+        self.playlist_dir_mtime = None
+        self.pdf_history_mtime = None
+
+    def refresh(self):
+        playlist_dir_mtime = _mtime_or_none(PLAYLIST_FOLDER)
+        pdf_history_mtime = _mtime_or_none(PDF_HISTORY_FILE)
+        changed = False
+
+        if playlist_dir_mtime != self.playlist_dir_mtime:
+            self.playlist_titles = []
+            if playlist_dir_mtime is not None:
+                with os.scandir(PLAYLIST_FOLDER) as entries:
+                    self.playlist_titles = [entry.name[:-len(".m3u")] for entry in entries
+                                            if entry.name.endswith(".m3u") and entry.is_file()]
+            self.playlist_title_set = frozenset(self.playlist_titles)
+            self.playlist_dir_mtime = playlist_dir_mtime
+            changed = True
+
+        if pdf_history_mtime != self.pdf_history_mtime:
+            self.pdf_basename_to_path = {}
+            if pdf_history_mtime is not None:
+                with open(PDF_HISTORY_FILE, "r", encoding="utf-8") as f:
+                    for line in f:
+                        pdf_path = line.strip()
+                        if pdf_path:
+                            self.pdf_basename_to_path.setdefault(os.path.basename(pdf_path), pdf_path)
+            self.pdf_history_mtime = pdf_history_mtime
+            changed = True
 
-    all_titles = playlist_titles + pdf_files
+        if changed:
+            self.all_titles = self.playlist_titles + list(self.pdf_basename_to_path)
+            self.title_by_lower = exact_title_lookup(self.all_titles)
+        return self
+
+def exact_title_lookup(titles):
+    """Map each lower-cased title to the first title spelled that way."""
+    return {title.lower(): title for title in reversed(titles)}
+
+_title_index = _TitleIndex()
+
+def fuzzy_best_title(query, titles, title_by_lower=None):
+    """Return the best fuzzy match for query among titles, or None.
+
+    A case-insensitive exact title is returned without any fuzzy scoring. Otherwise
+    titles sharing a word with the query are scored first; the full list is only
+    scored when that cheap regex pre-filter finds nothing above the cutoff.
+    """
+    if title_by_lower is None:
+        title_by_lower = exact_title_lookup(titles)
+    exact = title_by_lower.get(query.strip().lower())
+    if exact is not None:
+        return exact
+
+    words = query.split()
+    if words:
+        pattern = re.compile("|".join(map(re.escape, words)), re.IGNORECASE)
+        candidates = [t for t in titles if pattern.search(t)]
+        if candidates:
+            match = process.extractOne(query, candidates, scorer=fuzz.WRatio,
+                                       processor=utils.default_process, score_cutoff=60)
+            if match is not None:
+                return match[0]
+    match = process.extractOne(query, titles, scorer=fuzz.WRatio,
+                               processor=utils.default_process, score_cutoff=60)
+    return None if match is None else match[0]
+
+def length_sorted_column(values):
+    """Index non-empty strings by length for ratio_hits: (lengths, strings, positions), shortest first."""
+    column = sorted((len(v), v, i) for i, v in enumerate(values) if v)
+    return ([c[0] for c in column], [c[1] for c in column], [c[2] for c in column])
+
+def ratio_hits(query, column, score_cutoff):
+    """Return the positions in a length_sorted_column whose fuzz.ratio with query reaches score_cutoff.
+
+    fuzz.ratio can never exceed 200 * min(a, b) / (a + b), so only strings whose length
+    falls inside the band that bound allows are scored; the band is a bisect away.
+    """
+    lengths, strings, positions = column
+    n = len(query)
+    if not n or score_cutoff <= 0 or score_cutoff >= 200:
+        lo, hi = 0, len(lengths)
+    else:
+        lo = bisect.bisect_left(lengths, -(-n * score_cutoff // (200 - score_cutoff)))
+        hi = bisect.bisect_right(lengths, n * (200 - score_cutoff) // score_cutoff)
+    return {positions[lo + k] for _, _, k in process.extract(
+        query, strings[lo:hi], scorer=fuzz.ratio, processor=None,
+        score_cutoff=score_cutoff, limit=None)}
+
+def search_and_open(query):
+    index = _title_index.refresh()
+    all_titles = index.all_titles
 
     if not all_titles:
         messagebox.showwarning("No Data", "No playlists or PDFs found to search.")
         return
 
-    best_match, score = process.extractOne(query, all_titles)
-    if score < 60:
+    best_match = fuzzy_best_title(query, all_titles, index.title_by_lower)
+    if best_match is None:
         messagebox.showinfo("No Match", f"No close matches found for '{query}'.")
         return
 
-    if best_match in playlist_titles:
+    if best_match in index.playlist_title_set:
         playlist_path = os.path.join(PLAYLIST_FOLDER, best_match + ".m3u")
         try:
             launch_vlc(playlist_path)
@@ -409,13 +1071,10 @@ def search_and_open(query):
             messagebox.showerror("Error", f"Failed to open playlist in VLC:\n{e}")
     else:
         try:
-            with open(PDF_HISTORY_FILE, "r", encoding="utf-8") as f:
-                lines = [line.strip() for line in f if line.strip()]
-            matched_paths = [p for p in lines if os.path.basename(p) == best_match]
-            if not matched_paths:
+            pdf_path = index.pdf_basename_to_path.get(best_match)
+            if not pdf_path:
                 messagebox.showerror("Error", "PDF file not found in history.")
                 return
-            pdf_path = matched_paths[0]
             if not os.path.exists(pdf_path):
                 messagebox.showwarning("Missing File", f"PDF file no longer exists:\n{pdf_path}")
                 return
@@ -427,87 +1086,77 @@ def search_and_open(query):
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open PDF:\n{e}")
 
-def play_random_from_history2(history_file, description):
-    import os
-    import sys
-    import urllib.parse
-    import subprocess
-    import random
-    from natsort import natsorted
-    import string
-    import tkinter as tk
-    from tkinter import filedialog, messagebox
-    from fuzzywuzzy import process
-
-    # Maximum length for Windows filenames
-    MAX_FILENAME_LENGTH = 215
-    VALID_CHARS = f"-_.() {string.ascii_letters}{string.digits}"
-
-    # Path to VLC executable
-    if sys.platform == "win32":
-        VLC_PATH = r"C:\Program Files\VideoLAN\VLC\vlc.exe"
-    else:
-        VLC_PATH = "vlc"
-
-    # Folder to store generated .m3u playlists
-    PLAYLIST_FOLDER = "playlists"
-    os.makedirs(PLAYLIST_FOLDER, exist_ok=True)
-
-    class MKVPlaylistGenerator:
-        def __init__(self):
-            self.video_source_dir = ""
-            self.playlist_dest_dir = PLAYLIST_FOLDER
-
-        def set_directories(self, video_source_dir):
-            self.video_source_dir = video_source_dir
-
-        def sanitize_playlist_name(self, name):
-            """Sanitize filenames to only include valid characters."""
-            return ''.join(c for c in name if c in VALID_CHARS).strip()
-
-        def create_mkv_playlists(self):
-            """Recursively scan the source directory for .mkv files and create .m3u playlists."""
-            try:
-                if not os.path.exists(self.video_source_dir) or not os.path.isdir(self.video_source_dir):
-                    print(f"Error: Source directory '{self.video_source_dir}' not found.")
-                    return False
+def _normalize_history_entry(entry):
+    return urllib.parse.unquote(entry).replace("\\", "/").lower()
 
-                if not os.path.exists(self.playlist_dest_dir):
-                    os.makedirs(self.playlist_dest_dir)
-
-                mkv_files = []
-
-                for root, _, files in os.walk(self.video_source_dir):
-                    for file in files:
-                        if file.lower().endswith(".mkv"):
-                            full_path = os.path.abspath(os.path.join(root, file))
-                            mkv_files.append(full_path)
-
-                if not mkv_files:
-                    print("No MKV files found.")
-                    return False
+def _read_history_entries(history_path):
+    try:
+        with open(history_path, "r", encoding="utf-8") as f:
+            lines = (line.strip() for line in f)
+            return {_normalize_history_entry(line) for line in lines
+                    if line and not line.startswith("#")}
+    except FileNotFoundError:
+        return set()
 
-                for file_path in mkv_files:
-                    filename = os.path.splitext(os.path.basename(file_path))[0]
-                    safe_name = self.sanitize_playlist_name(filename)
-                    safe_name = safe_name[:MAX_FILENAME_LENGTH - len(".m3u")]
-                    playlist_path = os.path.join(self.playlist_dest_dir, f"{safe_name}.m3u")
+def _load_history_entries(history_path):
+    """Return the set of normalized entries in history_path."""
+    return _history_view(history_path, "entries", _read_history_entries)
 
-                    encoded_path = urllib.parse.quote(file_path)
-                    playlist_entry = f"file:///{encoded_path}"
+def _remember_history_entry(history_path, norm_entry):
+    """Record an entry we just appended, without invalidating the cached set."""
+    _remember_history_append(history_path, "entries", (norm_entry,))
 
-                    with open(playlist_path, "w", encoding="utf-8") as f:
-                        f.write(f"# Movie: {filename}\n")
-                        f.write(f"{playlist_entry}\n")
+def _history_line_offsets(history_path):
+    """Return an array of offsets of non-blank, non-comment lines in history_path.
 
-                    print(f"Written MKV playlist: {playlist_path}")
+    The file is scanned through mmap so only the offsets (8 bytes per line) are
+    kept, and the array is reused until the file's mtime changes.
+    """
+    return _history_view(history_path, "offsets", _scan_history_line_offsets)
+
+def _scan_history_line_offsets(history_path):
+    offsets = array.array("q")
+    with open(history_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                i = 0
+                while i < size:
+                    j = mm.find(b"\n", i)
+                    if j == -1:
+                        j = size
+                    if mm[i:i + 1] != b"#" and mm[i:j].strip():
+                        offsets.append(i)
+                    i = j + 1
+    return offsets
+
+def random_history_entry(history_path):
+    """Return one random playable entry from history_path, or None if it has none."""
+    offsets = _history_line_offsets(history_path)
+    if not offsets:
+        return None
+    with open(history_path, "rb") as f:
+        f.seek(random.choice(offsets))
+        return f.readline().decode("utf-8").strip()
 
-                return True
+def reservoir_pick(path, skip_comments=True):
+    """Pick one non-blank line of path uniformly at random in a single pass (Algorithm R).
 
-            except Exception as e:
-                print(f"Error occurred while creating MKV playlists: {e}")
-                return False
+    Only the current pick is kept in memory. Returns None if there is no such line.
+    """
+    selected = None
+    count = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or (skip_comments and line.startswith("#")):
+                continue
+            count += 1
+            if random.randrange(count) == 0:
+                selected = line
+    return selected
 
+def play_random_from_history2(history_file, description):
     def log_history(playlist_path):
         """Append played playlist to history.m3u in the playlists folder (no duplicates)."""
         history_path = os.path.join(PLAYLIST_FOLDER, "history.m3u")
@@ -516,21 +1165,14 @@ def play_random_from_history2(history_file, description):
         entry_path = os.path.abspath(playlist_path)
         encoded_entry = f"file:///{urllib.parse.quote(entry_path.replace(os.sep, '/'))}"
 
-        # Load and normalize existing entries
-        existing_entries = set()
-        if os.path.exists(history_path):
-            with open(history_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        norm_line = urllib.parse.unquote(line).replace("\\", "/").lower()
-                        existing_entries.add(norm_line)
-
-        norm_encoded = urllib.parse.unquote(encoded_entry).replace("\\", "/").lower()
+        # Existing entries, normalized and cached across calls
+        existing_entries = _load_history_entries(history_path)
+        norm_encoded = _normalize_history_entry(encoded_entry)
 
         if norm_encoded not in existing_entries:
             with open(history_path, "a", encoding="utf-8") as f:
                 f.write(f"{encoded_entry}\n")
+            _remember_history_entry(history_path, norm_encoded)
             print(f"Added to history: {encoded_entry}")
         else:
             print(f"Already in history: {encoded_entry}")
@@ -543,37 +1185,33 @@ def play_random_from_history2(history_file, description):
             messagebox.showinfo("History Empty", "No history found.")
             return
 
-        with open(history_path, "r", encoding="utf-8") as f:
-            entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
-
-        if not entries:
+        random_entry = random_history_entry(history_path)
+        if random_entry is None:
             messagebox.showinfo("History Empty", "No valid entries in history.")
             return
 
-        random_entry = random.choice(entries)
-
         try:
-            subprocess.run([VLC_PATH, random_entry])
+            start_process([VLC_PATH, random_entry])
         except Exception as e:
             messagebox.showerror("Error", f"Failed to play random playlist:\n{e}")
 
     def search_and_open(query):
         """Search for .m3u files matching the query and open them in VLC."""
-        playlist_files = [f for f in os.listdir(PLAYLIST_FOLDER) if f.endswith(".m3u") and f != "history.m3u"]
+        playlist_files = [f for f in list_playlist_files() if f != "history.m3u"]
         titles = [os.path.splitext(f)[0] for f in playlist_files]
 
         if not titles:
             messagebox.showwarning("No Playlists", "No playlists found. Please scan a folder first.")
             return
 
-        best_match, score = process.extractOne(query, titles)
-        if score < 60:
+        best_match = fuzzy_best_title(query, titles)
+        if best_match is None:
             messagebox.showinfo("No Match", f"No close matches found for '{query}'.")
             return
 
         playlist_path = os.path.join(PLAYLIST_FOLDER, best_match + ".m3u")
         try:
-            subprocess.run([VLC_PATH, playlist_path])
+            start_process([VLC_PATH, playlist_path])
             log_history(playlist_path)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open playlist in VLC:\n{e}")
@@ -639,12 +1277,6 @@ def play_random_from_history2(history_file, description):
 
 def play_random_from_history5(history_file, description):
 
-    import os
-    import pathlib
-    import tkinter as tk
-    from tkinter import filedialog, messagebox
-    import urllib.parse
-
     # ---------------------------------------------------------------------------
     # Core parsing / conversion functions
     # ---------------------------------------------------------------------------
@@ -661,35 +1293,12 @@ def play_random_from_history5(history_file, description):
         - Drop a trailing '.m3u' (case-insensitive).
         - Keep resulting text as the playlist display name.
         """
-        names: list[str] = []
-        for raw_line in text.splitlines():
-            line = raw_line.strip()
-            if not line:
-                continue
-            if line.startswith('#'):  # comment / directive
-                continue
-
-            # Strip file:/// prefix
-            if line.lower().startswith('file:///'):
-                path_part = line[8:]  # keep the remaining characters exactly as-is
-            else:
-                path_part = line
-
-            # Percent decode, if desired
-            if decode_percent:
-                path_part = urllib.parse.unquote(path_part)
-
-            # Get just the filename
-            filename = os.path.basename(path_part)
-
-            # Remove extension (.m3u)
-            if filename.lower().endswith('.m3u'):
-                filename = filename[:-4]
-
-            filename = filename.strip()
-            if filename:
-                names.append(filename)
-        return names
+        matches = map(_M3U_ENTRY_RE.fullmatch, text.splitlines())
+        path_parts = [m.group(1) for m in matches if m]
+        if decode_percent:
+            path_parts = map(urllib.parse.unquote, path_parts)
+        names = [_M3U_SUFFIX_RE.sub("", os.path.basename(p)).strip() for p in path_parts]
+        return [name for name in names if name]
 
 
     def build_playlist_lines(names: list[str], *, prefix: str = '# Playlist: ') -> str:
@@ -765,7 +1374,6 @@ def play_random_from_history5(history_file, description):
             python m3u_uri_to_playlist_converter.py in.m3u     # Convert to stdout
             python m3u_uri_to_playlist_converter.py in.m3u out.m3u  # Convert, write to out.m3u
         """
-        import sys
         if argv is None:
             argv = sys.argv[1:]
 
@@ -795,15 +1403,9 @@ def play_random_from_history5(history_file, description):
 
 
     if __name__ == "__main__":
-        import sys
         raise SystemExit(_cli())
 
 def play_random_from_history6(history_file, description):
-                    import os
-                    import shutil
-                    import tkinter as tk
-                    from tkinter import filedialog
-
                     def read_m3u_file(m3u_file_path):
                         """Reads the m3u file and returns a list of playlist names."""
                         playlists = []
@@ -814,28 +1416,18 @@ def play_random_from_history6(history_file, description):
                                     playlists.append(playlist_name)
                         return playlists
 
-                    def find_playlist_files(playlist_name, base_directory):
-                        """Search for .m3u playlist files in the given base directory."""
-                        matching_files = []
-                        for root, dirs, files in os.walk(base_directory):
-                            for file in files:
-                                if file.lower() == f"{playlist_name.lower()}.m3u":  # Match exactly (case-insensitive)
-                                    matching_files.append(os.path.join(root, file))
-                        return matching_files
-
                     def copy_files_to_target(files, target_folder):
                         """Copies all the playlist files in the list to the target folder."""
                         for file in files:
-                            if os.path.exists(file):
-                                try:
-                                    file_name = os.path.basename(file)
-                                    target_file = os.path.join(target_folder, file_name)
-                                    shutil.copy(file, target_file)
-                                    print(f"Copied: {file} to {target_file}")
-                                except Exception as e:
-                                    print(f"Error copying {file}: {e}")
-                            else:
+                            try:
+                                file_name = os.path.basename(file)
+                                target_file = os.path.join(target_folder, file_name)
+                                shutil.copyfile(file, target_file)
+                                print(f"Copied: {file} to {target_file}")
+                            except FileNotFoundError:
                                 print(f"File not found: {file}")
+                            except Exception as e:
+                                print(f"Error copying {file}: {e}")
 
                     def select_folder(title):
                         """Prompts the user to select a folder."""
@@ -879,10 +1471,15 @@ def play_random_from_history6(history_file, description):
                         if not target_folder:
                             return
 
+                        # Index the .m3u folder once: lower-cased file name -> full paths
+                        index = {}
+                        for path in iter_files_with_ext(m3u_folder, ".m3u"):
+                            index.setdefault(os.path.basename(path).lower(), []).append(path)
+
                         # Process each playlist and find matching .m3u files
                         for playlist in playlists:
                             print(f"Processing playlist: {playlist}")
-                            playlist_files = find_playlist_files(playlist, m3u_folder)
+                            playlist_files = index.get(f"{playlist.lower()}.m3u", [])
                             if playlist_files:
                                 print(f"Found {len(playlist_files)} .m3u file(s) for playlist: {playlist}")
                                 copy_files_to_target(playlist_files, target_folder)
@@ -896,12 +1493,18 @@ def play_random_from_history6(history_file, description):
 
 
 def play_random_from_history4(history_file, description):
-                    import os
-                    import shutil
-                    import urllib.request
-                    import tkinter as tk
-                    from tkinter import filedialog
-                    from urllib.parse import unquote
+                    def resolve_song_source(url_or_path):
+                        """
+                        Return the URL or local path a playlist entry points at.
+                        """
+                        # Clean the path and decode any URL-encoded characters (e.g., %20 for space)
+                        path = urllib.parse.unquote(url_or_path.strip())
+
+                        # Handle 'file:///' and 'file:\' URLs
+                        file_url = _FILE_URL_PREFIX_RE.match(path)
+                        if file_url:
+                            path = os.path.normpath(path[file_url.end():].replace("/", "\\"))
+                        return path
 
 
                     def download_song(url_or_path, download_folder):
@@ -909,19 +1512,7 @@ def play_random_from_history4(history_file, description):
                         Download a song from a URL or copy it from a local path into the specified folder.
                         """
                         try:
-                            # Clean the path and decode any URL-encoded characters (e.g., %20 for space)
-                            path = unquote(url_or_path.strip())
-
-                            # If the path starts with file:\, replace it with file://
-                            if path.lower().startswith("file:\\"):
-                                path = path.replace("file:\\", "file:///")
-
-                            # Handle 'file://' URLs
-                            if path.lower().startswith("file:///"):
-                                path = path[8:]  # Remove 'file:///' prefix
-                                path = unquote(path)
-                                path = path.replace("/", "\\")
-                                path = os.path.normpath(path)
+                            path = resolve_song_source(url_or_path)
 
                             filename = os.path.basename(path)
                             target_path = os.path.join(download_folder, filename)
@@ -931,12 +1522,13 @@ def play_random_from_history4(history_file, description):
                                 print(f"Downloading from URL: {path}")
                                 urllib.request.urlretrieve(path, target_path)
                                 print(f"Downloaded: {filename}")
-                            elif os.path.exists(path):
-                                print(f"Copying local file: {path}")
-                                shutil.copy(path, target_path)
-                                print(f"Copied: {filename}")
                             else:
-                                print(f"File not found or invalid path: {path}")
+                                print(f"Copying local file: {path}")
+                                try:
+                                    shutil.copyfile(path, target_path)
+                                    print(f"Copied: {filename}")
+                                except FileNotFoundError:
+                                    print(f"File not found or invalid path: {path}")
 
                         except Exception as e:
                             print(f"Error handling {url_or_path}: {e}")
@@ -944,36 +1536,28 @@ def play_random_from_history4(history_file, description):
 
                     def parse_m3u_file(file_path):
                         """
-                        Parse an M3U file and return a list of resolved file paths or URLs.
+                        Parse an M3U file and yield resolved file paths or URLs.
                         """
-                        lines = []
-                        for encoding in ['utf-8', 'latin-1']:
-                            try:
-                                with open(file_path, 'r', encoding=encoding) as file:
-                                    lines = file.readlines()
-                                break
-                            except UnicodeDecodeError:
-                                continue
-                        else:
-                            print(f"Error: Could not decode file {file_path}")
-                            return []
+                        with open(file_path, 'rb') as file:
+                            raw = file.read()
+                        # Decode once: UTF-8 when valid, otherwise latin-1 (which accepts any byte)
+                        try:
+                            text = raw.decode('utf-8')
+                        except UnicodeDecodeError:
+                            text = raw.decode('latin-1')
 
                         base_dir = os.path.dirname(file_path)
-                        song_paths = []
 
-                        for line in lines:
+                        for line in text.splitlines():
                             line = line.strip()
                             if line and not line.startswith("#"):
-                                decoded_line = unquote(line)
+                                decoded_line = urllib.parse.unquote(line)
 
                                 # If path is not absolute or URL, make it absolute
                                 if not decoded_line.startswith(("http://", "https://", "file://")) and not os.path.isabs(decoded_line):
                                     decoded_line = os.path.abspath(os.path.join(base_dir, decoded_line))
 
-                                decoded_line = os.path.normpath(decoded_line)
-                                song_paths.append(decoded_line)
-
-                        return song_paths
+                                yield os.path.normpath(decoded_line)
 
 
                     def download_playlist_from_folder(source_folder, download_folder):
@@ -984,6 +1568,9 @@ def play_random_from_history4(history_file, description):
                         if not os.path.exists(download_folder):
                             os.makedirs(download_folder)
 
+                        # One job per destination file: entries sharing a basename would otherwise be
+                        # written by two threads at once. The later entry wins, as it did sequentially.
+                        jobs = {}
                         for m3u_file in os.listdir(source_folder):
                             m3u_path = os.path.join(source_folder, m3u_file)
 
@@ -1001,10 +1588,23 @@ def play_random_from_history4(history_file, description):
 
                                 for path in song_paths:
                                     print(f"Resolved path: {path}")
-                                    download_song(path, playlist_folder)
+                                    filename = os.path.basename(resolve_song_source(path))
+                                    target = os.path.normcase(os.path.join(playlist_folder, filename))
+                                    jobs.pop(target, None)
+                                    jobs[target] = (path, playlist_folder)
                             else:
                                 print(f"Skipping non-M3U file: {m3u_file}")
 
+                        if not jobs:
+                            return
+
+                        # Downloads and copies are I/O-bound, so run a few concurrently
+                        with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(jobs))) as pool:
+                            futures = [pool.submit(download_song, path, playlist_folder)
+                                       for path, playlist_folder in jobs.values()]
+                            for future in as_completed(futures):
+                                future.result()
+
 
                     def select_folder(title="Select a Folder"):
                         """
@@ -1032,19 +1632,8 @@ def play_random_from_history4(history_file, description):
 
 
 def play_random_from_history3(history_file, description):
-    import os
-    import sys
-    import urllib.parse
-    import subprocess
-    import random
-    import string
-    import tkinter as tk
-    from tkinter import filedialog, messagebox
-    from fuzzywuzzy import process
-
     # Constants
     MAX_FILENAME_LENGTH = 215
-    VALID_CHARS = f"-_.() {string.ascii_letters}{string.digits}"
     if sys.platform == "win32":
         VLC_PATH = r"C:\Program Files\VideoLAN\VLC\vlc.exe"
     else:
@@ -1053,6 +1642,8 @@ def play_random_from_history3(history_file, description):
     os.makedirs(PLAYLIST_FOLDER, exist_ok=True)
 
     class MKVPlaylistGenerator:
+        __slots__ = ("video_source_dir", "playlist_dest_dir")
+
         def __init__(self):
             self.video_source_dir = ""
             self.playlist_dest_dir = PLAYLIST_FOLDER
@@ -1061,7 +1652,7 @@ def play_random_from_history3(history_file, description):
             self.video_source_dir = video_source_dir
 
         def sanitize_playlist_name(self, name):
-            return ''.join(c for c in name if c in VALID_CHARS).strip()
+            return sanitize_playlist_name(name)
 
         def create_mkv_playlists(self):
             try:
@@ -1072,31 +1663,26 @@ def play_random_from_history3(history_file, description):
                 if not os.path.exists(self.playlist_dest_dir):
                     os.makedirs(self.playlist_dest_dir)
 
-                mkv_files = []
-
-                for root, _, files in os.walk(self.video_source_dir):
-                    for file in files:
-                        if file.lower().endswith(".mkv"):
-                            full_path = os.path.abspath(os.path.join(root, file))
-                            mkv_files.append(full_path)
+                mkv_files = list(iter_files_with_ext(os.path.abspath(self.video_source_dir), ".mkv"))
 
                 if not mkv_files:
                     print("No MKV files found.")
                     return False
 
+                playlists = {}
                 for file_path in mkv_files:
                     filename = os.path.splitext(os.path.basename(file_path))[0]
                     safe_name = self.sanitize_playlist_name(filename)
                     safe_name = safe_name[:MAX_FILENAME_LENGTH - len(".m3u")]
                     playlist_path = os.path.join(self.playlist_dest_dir, f"{safe_name}.m3u")
 
-                    encoded_path = urllib.parse.quote(file_path)
-                    playlist_entry = f"file:///{encoded_path}"
-
-                    with open(playlist_path, "w", encoding="utf-8") as f:
-                        f.write(f"# Movie: {filename}\n")
-                        f.write(f"{playlist_entry}\n")
+                    playlist_entry = file_uri(file_path)
+                    playlists.pop(playlist_path, None)
+                    playlists[playlist_path] = f"# Movie: {filename}\n{playlist_entry}\n".encode("utf-8")
 
+                for playlist_path, error in write_playlist_files(playlists):
+                    if error is not None:
+                        raise error
                     print(f"Written MKV playlist: {playlist_path}")
 
                 return True
@@ -1110,20 +1696,13 @@ def play_random_from_history3(history_file, description):
         entry_path = os.path.abspath(playlist_path)
         encoded_entry = f"file:///{urllib.parse.quote(entry_path.replace(os.sep, '/'))}"
 
-        existing_entries = set()
-        if os.path.exists(history_path):
-            with open(history_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        norm_line = urllib.parse.unquote(line).replace("\\", "/").lower()
-                        existing_entries.add(norm_line)
-
-        norm_encoded = urllib.parse.unquote(encoded_entry).replace("\\", "/").lower()
+        existing_entries = _load_history_entries(history_path)
+        norm_encoded = _normalize_history_entry(encoded_entry)
 
         if norm_encoded not in existing_entries:
             with open(history_path, "a", encoding="utf-8") as f:
                 f.write(f"{encoded_entry}\n")
+            _remember_history_entry(history_path, norm_encoded)
             print(f"Added to history: {encoded_entry}")
         else:
             print(f"Already in history: {encoded_entry}")
@@ -1135,36 +1714,32 @@ def play_random_from_history3(history_file, description):
             messagebox.showinfo("History Empty", "No history found.")
             return
 
-        with open(history_path, "r", encoding="utf-8") as f:
-            entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
-
-        if not entries:
+        random_entry = random_history_entry(history_path)
+        if random_entry is None:
             messagebox.showinfo("History Empty", "No valid entries in history.")
             return
 
-        random_entry = random.choice(entries)
-
         try:
-            subprocess.run([VLC_PATH, random_entry])
+            start_process([VLC_PATH, random_entry])
         except Exception as e:
             messagebox.showerror("Error", f"Failed to play random playlist:\n{e}")
 
     def search_and_open(query):
-        playlist_files = [f for f in os.listdir(PLAYLIST_FOLDER) if f.endswith(".m3u") and f != "history.m3u"]
+        playlist_files = [f for f in list_playlist_files() if f != "history.m3u"]
         titles = [os.path.splitext(f)[0] for f in playlist_files]
 
         if not titles:
             messagebox.showwarning("No Playlists", "No playlists found. Please scan a folder first.")
             return
 
-        best_match, score = process.extractOne(query, titles)
-        if score < 60:
+        best_match = fuzzy_best_title(query, titles)
+        if best_match is None:
             messagebox.showinfo("No Match", f"No close matches found for '{query}'.")
             return
 
         playlist_path = os.path.join(PLAYLIST_FOLDER, best_match + ".m3u")
         try:
-            subprocess.run([VLC_PATH, playlist_path])
+            start_process([VLC_PATH, playlist_path])
             log_history(playlist_path)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open playlist in VLC:\n{e}")
@@ -1232,18 +1807,7 @@ def play_random_from_history3(history_file, description):
 
 
 def play_random_from_history(history_file, description):
-    import os
-    import sys
-    import urllib.parse
-    import subprocess
-    import string
-    import random
-    import tkinter as tk
-    from tkinter import filedialog, messagebox
-    from fuzzywuzzy import process
-
     MAX_FILENAME_LENGTH = 215
-    VALID_CHARS = f"-_.() {string.ascii_letters}{string.digits}"
 
     if sys.platform == "win32":
         VLC_PATH = r"C:\Program Files\VideoLAN\VLC\vlc.exe"
@@ -1259,6 +1823,8 @@ def play_random_from_history(history_file, description):
     PDF_HISTORY_FILE = os.path.join(PLAYLIST_FOLDER, "pdf_history.txt")
 
     class PlaylistGenerator:
+        __slots__ = ("extension", "source_dir", "playlist_dest_dir")
+
         def __init__(self, extension):
             self.extension = extension.lower()
             self.source_dir = ""
@@ -1268,7 +1834,7 @@ def play_random_from_history(history_file, description):
             self.source_dir = source_dir
 
         def sanitize_playlist_name(self, name):
-            return ''.join(c for c in name if c in VALID_CHARS).strip()
+            return sanitize_playlist_name(name)
 
         def create_playlists(self):
             try:
@@ -1279,31 +1845,28 @@ def play_random_from_history(history_file, description):
                 if not os.path.exists(self.playlist_dest_dir):
                     os.makedirs(self.playlist_dest_dir)
 
-                media_files = []
-                for root, _, files in os.walk(self.source_dir):
-                    for file in files:
-                        if file.lower().endswith(self.extension):
-                            full_path = os.path.abspath(os.path.join(root, file))
-                            media_files.append(full_path)
+                media_files = list(iter_files_with_ext(os.path.abspath(self.source_dir), self.extension))
 
                 if not media_files:
                     print(f"No {self.extension.upper()} files found.")
                     return False
 
+                label = self.extension.upper()
+                playlists = {}
                 for file_path in media_files:
                     filename = os.path.splitext(os.path.basename(file_path))[0]
                     safe_name = self.sanitize_playlist_name(filename)
                     safe_name = safe_name[:MAX_FILENAME_LENGTH - len(".m3u")]
                     playlist_path = os.path.join(self.playlist_dest_dir, f"{safe_name}.m3u")
 
-                    encoded_path = urllib.parse.quote(file_path)
-                    playlist_entry = f"file:///{encoded_path}"
+                    playlist_entry = file_uri(file_path)
+                    playlists.pop(playlist_path, None)
+                    playlists[playlist_path] = f"# {label} File: {filename}\n{playlist_entry}\n".encode("utf-8")
 
-                    with open(playlist_path, "w", encoding="utf-8") as f:
-                        f.write(f"# {self.extension.upper()} File: {filename}\n")
-                        f.write(f"{playlist_entry}\n")
-
-                    print(f"Written {self.extension.upper()} playlist: {playlist_path}")
+                for playlist_path, error in write_playlist_files(playlists):
+                    if error is not None:
+                        raise error
+                    print(f"Written {label} playlist: {playlist_path}")
 
                 return True
 
@@ -1315,6 +1878,8 @@ def play_random_from_history(history_file, description):
         """
         Scans for PDFs and creates a single text playlist file listing all found PDFs.
         """
+        __slots__ = ("source_dir", "playlist_dest_dir")
+
         def __init__(self):
             self.source_dir = ""
             self.playlist_dest_dir = PLAYLIST_FOLDER
@@ -1328,12 +1893,7 @@ def play_random_from_history(history_file, description):
                     print(f"Error: Source directory '{self.source_dir}' not found.")
                     return False
 
-                pdf_files = []
-                for root, _, files in os.walk(self.source_dir):
-                    for file in files:
-                        if file.lower().endswith(".pdf"):
-                            full_path = os.path.abspath(os.path.join(root, file))
-                            pdf_files.append(full_path)
+                pdf_files = list(iter_files_with_ext(os.path.abspath(self.source_dir), ".pdf"))
 
                 if not pdf_files:
                     print("No PDF files found.")
@@ -1341,8 +1901,7 @@ def play_random_from_history(history_file, description):
 
                 with open(PDF_PLAYLIST_FILE, "w", encoding="utf-8") as f:
                     for file_path in pdf_files:
-                        encoded_path = urllib.parse.quote(file_path)
-                        playlist_entry = f"file:///{encoded_path}"
+                        playlist_entry = file_uri(file_path)
                         f.write(f"{playlist_entry}\n")
 
                 print(f"Written PDF playlist file: {PDF_PLAYLIST_FILE}")
@@ -1365,14 +1924,10 @@ def play_random_from_history(history_file, description):
             messagebox.showinfo("No History", f"No {description} history found.")
             return
 
-        with open(history_file, "r", encoding="utf-8") as f:
-            entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
-
-        if not entries:
+        selected = random_history_entry(history_file)
+        if selected is None:
             messagebox.showinfo("Empty History", f"No entries found in {description} history.")
             return
-
-        selected = random.choice(entries)
         selected_path = urllib.parse.unquote(selected[8:]) if selected.startswith("file:///") else selected
 
         if not os.path.exists(selected_path):
@@ -1384,11 +1939,11 @@ def play_random_from_history(history_file, description):
                 if sys.platform == "win32":
                     os.startfile(selected_path)
                 elif sys.platform == "darwin":
-                    subprocess.run(["open", selected_path])
+                    start_process(["open", selected_path])
                 else:
-                    subprocess.run(["xdg-open", selected_path])
+                    start_process(["xdg-open", selected_path])
             else:
-                subprocess.run([VLC_PATH, selected_path])
+                start_process([VLC_PATH, selected_path])
             messagebox.showinfo("Playing Random", f"Playing random {description}:\n{os.path.basename(selected_path)}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open {description}:\n{e}")
@@ -1400,19 +1955,20 @@ def play_random_from_history(history_file, description):
 
         with open(file_path, "r", encoding="utf-8") as f:
             for line in f:
-                if line.strip().startswith("file:///"):
-                    path = urllib.parse.unquote(line.strip()[8:])
+                line = line.strip()
+                if line.startswith("file:///"):
+                    path = urllib.parse.unquote(line[8:])
                     if os.path.exists(path):
                         try:
                             if history_file == PDF_HISTORY_FILE:
                                 if sys.platform == "win32":
                                     os.startfile(path)
                                 elif sys.platform == "darwin":
-                                    subprocess.run(["open", path])
+                                    start_process(["open", path])
                                 else:
-                                    subprocess.run(["xdg-open", path])
+                                    start_process(["xdg-open", path])
                             else:
-                                subprocess.run([VLC_PATH, path])
+                                start_process([VLC_PATH, path])
                             log_media_opened(path, history_file)
                         except Exception as e:
                             messagebox.showerror("Error", f"Failed to open media:\n{e}")
@@ -1422,7 +1978,7 @@ def play_random_from_history(history_file, description):
 
     def search_and_open(query):
         # Gather all playlist files for MKV and MP4
-        playlist_files = [f for f in os.listdir(PLAYLIST_FOLDER) if f.endswith(".m3u")]
+        playlist_files = list_playlist_files()
         # Include PDF playlist file if exists
         if os.path.exists(PDF_PLAYLIST_FILE):
             playlist_files.append(os.path.basename(PDF_PLAYLIST_FILE))
@@ -1447,8 +2003,8 @@ def play_random_from_history(history_file, description):
             messagebox.showwarning("No Data", "No playlists found to search.")
             return
 
-        best_match, score = process.extractOne(query, titles)
-        if score < 60:
+        best_match = fuzzy_best_title(query, titles)
+        if best_match is None:
             messagebox.showinfo("No Match", f"No close matches found for '{query}'.")
             return
 
@@ -1511,18 +2067,7 @@ def play_random_from_history(history_file, description):
                 messagebox.showinfo("Scan Failed", "No MP4 files found.")
 
         def scan_pdf_folder(self):
-            import os
-            import sys
-            import urllib.parse
-            import subprocess
-            import string
-            import random
-            import tkinter as tk
-            from tkinter import filedialog, messagebox
-            from fuzzywuzzy import process
-
             MAX_FILENAME_LENGTH = 215
-            VALID_CHARS = f"-_.() {string.ascii_letters}{string.digits}"
 
             if sys.platform == "win32":
                 VLC_PATH = r"C:\Program Files\VideoLAN\VLC\vlc.exe"
@@ -1538,6 +2083,8 @@ def play_random_from_history(history_file, description):
             PDF_OPENED_HISTORY_FILE = os.path.join(PLAYLIST_FOLDER, "pdf_opened_history.txt")
 
             class MKVPlaylistGenerator:
+                __slots__ = ("video_source_dir", "playlist_dest_dir")
+
                 def __init__(self):
                     self.video_source_dir = ""
                     self.playlist_dest_dir = PLAYLIST_FOLDER
@@ -1546,7 +2093,7 @@ def play_random_from_history(history_file, description):
                     self.video_source_dir = video_source_dir
 
                 def sanitize_playlist_name(self, name):
-                    return ''.join(c for c in name if c in VALID_CHARS).strip()
+                    return sanitize_playlist_name(name)
 
                 def create_mkv_playlists(self):
                     try:
@@ -1557,30 +2104,26 @@ def play_random_from_history(history_file, description):
                         if not os.path.exists(self.playlist_dest_dir):
                             os.makedirs(self.playlist_dest_dir)
 
-                        mkv_files = []
-                        for root, _, files in os.walk(self.video_source_dir):
-                            for file in files:
-                                if file.lower().endswith(".mkv"):
-                                    full_path = os.path.abspath(os.path.join(root, file))
-                                    mkv_files.append(full_path)
+                        mkv_files = list(iter_files_with_ext(os.path.abspath(self.video_source_dir), ".mkv"))
 
                         if not mkv_files:
                             print("No MKV files found.")
                             return False
 
+                        playlists = {}
                         for file_path in mkv_files:
                             filename = os.path.splitext(os.path.basename(file_path))[0]
                             safe_name = self.sanitize_playlist_name(filename)
                             safe_name = safe_name[:MAX_FILENAME_LENGTH - len(".m3u")]
                             playlist_path = os.path.join(self.playlist_dest_dir, f"{safe_name}.m3u")
 
-                            encoded_path = urllib.parse.quote(file_path)
-                            playlist_entry = f"file:///{encoded_path}"
-
-                            with open(playlist_path, "w", encoding="utf-8") as f:
-                                f.write(f"# Movie: {filename}\n")
-                                f.write(f"{playlist_entry}\n")
+                            playlist_entry = file_uri(file_path)
+                            playlists.pop(playlist_path, None)
+                            playlists[playlist_path] = f"# Movie: {filename}\n{playlist_entry}\n".encode("utf-8")
 
+                        for playlist_path, error in write_playlist_files(playlists):
+                            if error is not None:
+                                raise error
                             print(f"Written MKV playlist: {playlist_path}")
 
                         return True
@@ -1589,97 +2132,33 @@ def play_random_from_history(history_file, description):
                         print(f"Error occurred while creating MKV playlists: {e}")
                         return False
 
-            def create_mp4_playlists(folder, playlist_dest):
-                """Scan folder for mp4 files and create one .m3u playlist per mp4 file."""
-                if not folder or not os.path.isdir(folder):
-                    return False
-
-                mp4_files = []
-                for root, _, files in os.walk(folder):
-                    for file in files:
-                        if file.lower().endswith(".mp4"):
-                            full_path = os.path.abspath(os.path.join(root, file))
-                            mp4_files.append(full_path)
-
-                if not mp4_files:
-                    return False
-
-                if not os.path.exists(playlist_dest):
-                    os.makedirs(playlist_dest)
-
-                for file_path in mp4_files:
-                    filename = os.path.splitext(os.path.basename(file_path))[0]
-                    safe_name = ''.join(c for c in filename if c in VALID_CHARS).strip()
-                    safe_name = safe_name[:MAX_FILENAME_LENGTH - len(".m3u")]
-                    playlist_path = os.path.join(playlist_dest, f"{safe_name}.m3u")
-
-                    encoded_path = urllib.parse.quote(file_path)
-                    playlist_entry = f"file:///{encoded_path}"
-
-                    try:
-                        with open(playlist_path, "w", encoding="utf-8") as f:
-                            f.write(f"# Movie: {filename}\n")
-                            f.write(f"{playlist_entry}\n")
-                        print(f"Written MP4 playlist: {playlist_path}")
-                    except Exception as e:
-                        print(f"Failed to write playlist for {file_path}: {e}")
-
-                return True
-
-            def log_pdf_opened(pdf_path):
-                """Log PDF path to opened PDFs history file (avoid duplicates)."""
-                try:
-                    if not os.path.exists(PDF_OPENED_HISTORY_FILE):
-                        with open(PDF_OPENED_HISTORY_FILE, "w", encoding="utf-8") as f:
-                            f.write(pdf_path + "\n")
-                        return
-
-                    with open(PDF_OPENED_HISTORY_FILE, "r", encoding="utf-8") as f:
-                        lines = set(line.strip() for line in f if line.strip())
-
-                    if pdf_path not in lines:
-                        with open(PDF_OPENED_HISTORY_FILE, "a", encoding="utf-8") as f:
-                            f.write(pdf_path + "\n")
-                except Exception as e:
-                    print(f"Failed to log opened PDF: {e}")
-
             def search_and_open(query):
-                playlist_files = [f for f in os.listdir(PLAYLIST_FOLDER) if f.endswith(".m3u")]
-                playlist_titles = [os.path.splitext(f)[0] for f in playlist_files]
-
-                pdf_files = []
-                if os.path.exists(PDF_HISTORY_FILE):
-                    with open(PDF_HISTORY_FILE, "r", encoding="utf-8") as f:
-                        pdf_paths = [line.strip() for line in f if line.strip()]
-                    pdf_files = [os.path.basename(p) for p in pdf_paths]
-
-                all_titles = playlist_titles + pdf_files
+                # Titles are cached and only rebuilt when the folder or PDF history changes
+                index = _title_index.refresh()
+                all_titles = index.all_titles
 
                 if not all_titles:
                     messagebox.showwarning("No Data", "No playlists or PDFs found to search.")
                     return
 
-                best_match, score = process.extractOne(query, all_titles)
-                if score < 60:
+                best_match = fuzzy_best_title(query, all_titles, index.title_by_lower)
+                if best_match is None:
                     messagebox.showinfo("No Match", f"No close matches found for '{query}'.")
                     return
 
-                if best_match in playlist_titles:
+                if best_match in index.playlist_title_set:
                     playlist_path = os.path.join(PLAYLIST_FOLDER, best_match + ".m3u")
                     try:
-                        subprocess.run([VLC_PATH, playlist_path])
+                        start_process([VLC_PATH, playlist_path])
                         messagebox.showinfo("Opening Playlist", f"Opening playlist: {best_match}")
                     except Exception as e:
                         messagebox.showerror("Error", f"Failed to open playlist in VLC:\n{e}")
                 else:
                     try:
-                        with open(PDF_HISTORY_FILE, "r", encoding="utf-8") as f:
-                            lines = [line.strip() for line in f if line.strip()]
-                        matched_paths = [p for p in lines if os.path.basename(p) == best_match]
-                        if not matched_paths:
+                        pdf_path = index.pdf_basename_to_path.get(best_match)
+                        if not pdf_path:
                             messagebox.showerror("Error", "PDF file not found in history.")
                             return
-                        pdf_path = matched_paths[0]
                         if not os.path.exists(pdf_path):
                             messagebox.showwarning("Missing File", f"PDF file no longer exists:\n{pdf_path}")
                             return
@@ -1687,9 +2166,9 @@ def play_random_from_history(history_file, description):
                         if sys.platform == "win32":
                             os.startfile(pdf_path)
                         elif sys.platform == "darwin":
-                            subprocess.run(["open", pdf_path])
+                            start_process(["open", pdf_path])
                         else:
-                            subprocess.run(["xdg-open", pdf_path])
+                            start_process(["xdg-open", pdf_path])
                         log_pdf_opened(pdf_path)  # Log that this PDF has been opened
                         messagebox.showinfo("Opening PDF", f"Opening PDF: {best_match}")
                     except Exception as e:
@@ -1700,14 +2179,10 @@ def play_random_from_history(history_file, description):
                     messagebox.showinfo("No History", f"No {description} history found.")
                     return
 
-                with open(history_file, "r", encoding="utf-8") as f:
-                    entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
-
-                if not entries:
+                selected = random_history_entry(history_file)
+                if selected is None:
                     messagebox.showinfo("Empty History", f"No entries found in {description} history.")
                     return
-
-                selected = random.choice(entries)
                 if selected.startswith("file:///"):
                     selected_path = urllib.parse.unquote(selected[8:])
                 else:
@@ -1722,63 +2197,25 @@ def play_random_from_history(history_file, description):
                         if sys.platform == "win32":
                             os.startfile(selected_path)
                         elif sys.platform == "darwin":
-                            subprocess.run(["open", selected_path])
+                            start_process(["open", selected_path])
                         else:
-                            subprocess.run(["xdg-open", selected_path])
+                            start_process(["xdg-open", selected_path])
                     else:
-                        subprocess.run([VLC_PATH, selected_path])
+                        start_process([VLC_PATH, selected_path])
                     messagebox.showinfo("Playing Random", f"Playing random {description}:\n{os.path.basename(selected_path)}")
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to open {description}:\n{e}")
 
-            def scan_and_log_files(folder, extensions, history_file):
-                if not folder or not os.path.isdir(folder):
-                    return False
-
-                files = []
-                for root, _, filenames in os.walk(folder):
-                    for filename in filenames:
-                        if filename.lower().endswith(extensions):
-                            full_path = os.path.abspath(os.path.join(root, filename))
-                            files.append(full_path)
-
-                if not files:
-                    return False
-
-                existing_files = set()
-                if os.path.exists(history_file):
-                    with open(history_file, "r", encoding="utf-8") as f:
-                        existing_files = set(line.strip() for line in f if line.strip())
-
-                new_files = [f for f in files if f not in existing_files]
-
-                if not new_files:
-                    return False
-
-                with open(history_file, "a", encoding="utf-8") as f:
-                    for file_path in new_files:
-                        if history_file.endswith(".m3u"):
-                            encoded_path = urllib.parse.quote(file_path)
-                            f.write(f"file:///{encoded_path}\n")
-                        else:
-                            f.write(f"{file_path}\n")
-
-                return True
-
             def play_random_pdf_opened():
                 if not os.path.exists(PDF_OPENED_HISTORY_FILE):
                     messagebox.showinfo("No History", "No PDFs have been opened yet.")
                     return
 
-                with open(PDF_OPENED_HISTORY_FILE, "r", encoding="utf-8") as f:
-                    pdf_paths = [line.strip() for line in f if line.strip()]
-
-                if not pdf_paths:
+                selected_pdf = reservoir_pick(PDF_OPENED_HISTORY_FILE, skip_comments=False)
+                if selected_pdf is None:
                     messagebox.showinfo("Empty History", "No PDFs have been opened yet.")
                     return
 
-                selected_pdf = random.choice(pdf_paths)
-
                 if not os.path.exists(selected_pdf):
                     messagebox.showwarning("Missing File", f"PDF file does not exist:\n{selected_pdf}")
                     return
@@ -1787,9 +2224,9 @@ def play_random_from_history(history_file, description):
                     if sys.platform == "win32":
                         os.startfile(selected_pdf)
                     elif sys.platform == "darwin":
-                        subprocess.run(["open", selected_pdf])
+                        start_process(["open", selected_pdf])
                     else:
-                        subprocess.run(["xdg-open", selected_pdf])
+                        start_process(["xdg-open", selected_pdf])
                     messagebox.showinfo("Opening Random PDF", f"Opening PDF: {os.path.basename(selected_pdf)}")
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to open PDF:\n{e}")
@@ -1897,33 +2334,27 @@ def scan_and_log_files(folder, extensions, history_file):
     if not folder or not os.path.isdir(folder):
         return False
 
-    files = []
-    for root, _, filenames in os.walk(folder):
-        for filename in filenames:
-            if filename.lower().endswith(extensions):
-                full_path = os.path.abspath(os.path.join(root, filename))
-                files.append(full_path)
+    files = scan_files_parallel(os.path.abspath(folder), extensions)
 
     if not files:
         return False
 
-    existing_files = set()
-    if os.path.exists(history_file):
-        with open(history_file, "r", encoding="utf-8") as f:
-            existing_files = set(line.strip() for line in f if line.strip())
+    # Concurrent scans may share a history file; check-and-append must not interleave
+    with _history_write_lock:
+        existing_files = get_history_set(history_file)
 
-    new_files = [f for f in files if f not in existing_files]
+        new_files = [f for f in files if f not in existing_files]
 
-    if not new_files:
-        return False
+        if not new_files:
+            return False
 
-    with open(history_file, "a", encoding="utf-8") as f:
-        for file_path in new_files:
-            if history_file.endswith(".m3u"):
-                encoded_path = urllib.parse.quote(file_path)
-                f.write(f"file:///{encoded_path}\n")
-            else:
-                f.write(f"{file_path}\n")
+        if history_file.endswith(".m3u"):
+            written = [file_uri(file_path) for file_path in new_files]
+        else:
+            written = new_files
+        with open(history_file, "a", encoding="utf-8", buffering=1 << 20) as f:
+            f.writelines(f"{entry}\n" for entry in written)
+        remember_history_lines(history_file, written)
 
     return True
 
@@ -1932,15 +2363,11 @@ def play_random_pdf_opened():
         messagebox.showinfo("No History", "No PDFs have been opened yet.")
         return
 
-    with open(PDF_OPENED_HISTORY_FILE, "r", encoding="utf-8") as f:
-        pdf_paths = [line.strip() for line in f if line.strip()]
-
-    if not pdf_paths:
+    selected_pdf = reservoir_pick(PDF_OPENED_HISTORY_FILE, skip_comments=False)
+    if selected_pdf is None:
         messagebox.showinfo("Empty History", "No PDFs have been opened yet.")
         return
 
-    selected_pdf = random.choice(pdf_paths)
-
     if not os.path.exists(selected_pdf):
         messagebox.showwarning("Missing File", f"PDF file does not exist:\n{selected_pdf}")
         return
@@ -1957,14 +2384,11 @@ def play_random_from_search_history():
         return
 
     try:
-        with open(SEARCH_HISTORY_FILE, "r", encoding="utf-8") as f:
-            lines = [line.strip() for line in f if line.strip()]
-        
-        if not lines:
+        random_query = reservoir_pick(SEARCH_HISTORY_FILE, skip_comments=False)
+        if random_query is None:
             messagebox.showinfo("Empty History", "Search history is empty.")
             return
 
-        random_query = random.choice(lines)
         search_and_open(random_query)
     except Exception as e:
         messagebox.showerror("Error", f"Failed to play from search history: {e}")
@@ -1974,17 +2398,27 @@ VLC_PROCESS = None
 VLC_RC_HOST = "localhost"
 VLC_RC_PORT = 42123
 
-def connect_vlc_socket():
+def connect_vlc_socket(timeout=5.0):
+    """Connect to VLC's RC interface as soon as it starts listening.
+
+    Nothing signals when the port opens, so refused connects are retried with a
+    short backoff (10 ms doubling to 100 ms) and give up early if VLC has exited.
+    """
     global VLC_SOCKET
-    start = time.time()
-    while time.time() - start < 5:
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while time.monotonic() < deadline:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.connect((VLC_RC_HOST, VLC_RC_PORT))
             VLC_SOCKET = s
-            break
+            return
         except ConnectionRefusedError:
-            time.sleep(0.1)
+            s.close()
+            if VLC_PROCESS is not None and VLC_PROCESS.poll() is not None:
+                return
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
 
 def send_vlc_command(cmd):
     global VLC_SOCKET
@@ -1999,7 +2433,12 @@ def send_vlc_command(cmd):
 
 def launch_vlc(media_path):
     global VLC_PROCESS, VLC_SOCKET
-    
+
+    # Reuse a running VLC over its RC socket; spawning a new process is far slower
+    if VLC_SOCKET and VLC_PROCESS and VLC_PROCESS.poll() is None:
+        if send_vlc_command("clear") and send_vlc_command(f"add {media_path}"):
+            return
+
     if VLC_SOCKET:
         try:
             VLC_SOCKET.close()
@@ -2021,18 +2460,59 @@ def launch_vlc(media_path):
     ]
     
     try:
-        VLC_PROCESS = subprocess.Popen(cmd)
+        VLC_PROCESS = start_process(cmd)
         
         threading.Thread(target=connect_vlc_socket, daemon=True).start()
     except Exception as e:
         messagebox.showerror("Error", f"Failed to launch VLC: {e}")
 
+class LibraryWatchHandler:
+    """watchdog event handler: calls on_change when a library playlist or the PDF history changes.
+
+    Sidecars, temp files and the scan history playlists are ignored, so the
+    refresh they trigger cannot set off another one.
+    """
+
+    def __init__(self, on_change):
+        self.on_change = on_change
+
+    def is_library_file(self, path):
+        name = os.path.basename(path)
+        if name in ("history.m3u", "history2.m3u"):
+            return False
+        return name.endswith(".m3u") or name == os.path.basename(PDF_HISTORY_FILE)
+
+    def dispatch(self, event):
+        # Opens and closes (VLC or a metadata reparse reading a playlist) are not changes
+        if event.is_directory or event.event_type not in ("created", "modified", "deleted", "moved"):
+            return
+        paths = (event.src_path, getattr(event, "dest_path", ""))
+        if any(path and self.is_library_file(path) for path in paths):
+            self.on_change()
+
 class MKVPlayerApp:
     def __init__(self, root):
         self.root = root
         self.generator = MKVPlaylistGenerator()
         self.config = load_config()
+        self._save_after = None
+        atexit.register(self.save_pending_config)
         self.current_thumbnail = None
+        self._thumb_cache = OrderedDict()
+        self._prefetched = OrderedDict()
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_queue = queue.Queue()
+        self._prefetch_generation = 0
+        self._prefetch_thread = None
+        self._filter_after = None
+        self._populate_after = None
+        self._scan_thread = None
+        self._refresh_thread = None
+        self._refresh_pending = False
+        self._watch_after = None
+        self._library_events = queue.Queue()
+        self._library_dirty = False
+        self._showing_cached_library = False
 
         self.create_menu()
 
@@ -2043,7 +2523,7 @@ class MKVPlayerApp:
         self.entry = tk.Entry(search_frame, width=30)
         self.entry.pack(side=tk.LEFT, padx=(0, 5))
         self.entry.bind("<Return>", self.search_event)
-        self.entry.bind("<KeyRelease>", self.filter_library)
+        self.entry.bind("<KeyRelease>", self.schedule_filter)
         tk.Button(search_frame, text="Search", command=self.search).pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Play", command=self.play_selected).pack(side=tk.LEFT, padx=5)
 
@@ -2136,11 +2616,21 @@ class MKVPlayerApp:
         tk.Button(btn_frame3, text="Refresh Library", command=self.refresh_library).pack(side=tk.LEFT, padx=2)
 
         self.all_media_items = []
+        self._by_name = {}
+        self._search_columns = (length_sorted_column([]),) * 3
         self.sort_reverse = False
         self.sort_col = "name"
 
         self.run_auto_scan()
+        # Show last run's library straight away; the refresh below reconciles it with disk
+        cached_items = load_library_cache()
+        if cached_items:
+            self.apply_media_items(cached_items)
+            self._showing_cached_library = True
+        self._library_dirty = False
+        atexit.register(self.save_library_on_exit)
         self.refresh_library()
+        self.start_library_watch()
 
     def play_random_media(self, history_file, description):
         if not os.path.exists(history_file):
@@ -2148,16 +2638,14 @@ class MKVPlayerApp:
             return
 
         try:
-            with open(history_file, "r", encoding="utf-8") as f:
-                entries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+            selected = random_history_entry(history_file)
         except:
             return
 
-        if not entries:
+        if selected is None:
             messagebox.showinfo("Empty History", f"No entries found in {description} history.")
             return
 
-        selected = random.choice(entries)
         if selected.startswith("file:///"):
             selected = urllib.parse.unquote(selected[8:])
         
@@ -2183,8 +2671,25 @@ class MKVPlayerApp:
 
     def toggle_auto_scan(self):
         self.config["auto_scan_enabled"] = self.auto_scan_var.get()
+        self.schedule_save()
+
+    def schedule_save(self):
+        """Write the config 500 ms after the last edit, so a burst of edits costs one write."""
+        if self._save_after is not None:
+            self.root.after_cancel(self._save_after)
+        self._save_after = self.root.after(500, self.flush_save)
+
+    def flush_save(self):
+        # The config is a few hundred bytes; writing it inline keeps saves in edit order
+        self._save_after = None
         save_config(self.config)
 
+    def save_pending_config(self):
+        """atexit hook: write an edit whose debounced save never got to run."""
+        if self._save_after is not None:
+            self._save_after = None
+            save_config(self.config)
+
     def configure_auto_scan(self):
         config_window = tk.Toplevel(self.root)
         config_window.title("Configure Auto-Scan Folders")
@@ -2240,10 +2745,11 @@ class MKVPlayerApp:
     def add_folder(self, listbox, folder_type):
         folder = filedialog.askdirectory(title=f"Select folder for {folder_type.upper()} scanning")
         if folder:
-            if folder not in self.config["scan_folders"][folder_type]:
-                self.config["scan_folders"][folder_type].append(folder)
+            folders = self.config["scan_folders"][folder_type]
+            if folder not in folders:
+                folders[folder] = None
                 listbox.insert(tk.END, folder)
-                save_config(self.config)
+                self.schedule_save()
 
     def remove_folder(self, listbox, folder_type):
         selection = listbox.curselection()
@@ -2251,87 +2757,164 @@ class MKVPlayerApp:
             index = selection[0]
             folder = listbox.get(index)
             listbox.delete(index)
-            if folder in self.config["scan_folders"][folder_type]:
-                self.config["scan_folders"][folder_type].remove(folder)
-                save_config(self.config)
+            folders = self.config["scan_folders"][folder_type]
+            if folder in folders:
+                del folders[folder]
+                self.schedule_save()
+
+    def run_in_background(self, work, on_done, status="Scanning..."):
+        """Run work() on a worker thread and hand its result to on_done on the Tk thread.
+
+        Scans can take minutes on large libraries; only one runs at a time.
+        """
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            messagebox.showinfo("Scan Running", "A scan is already in progress.")
+            return
+
+        previous_status = self.status_var.get()
+        self.status_var.set(status)
+
+        def finish(result, error):
+            self.status_var.set(previous_status)
+            if error is not None:
+                messagebox.showerror("Scan Error", f"Scan failed:\n{error}")
+            else:
+                on_done(result)
+
+        outcome = [None, None]
+
+        def worker():
+            try:
+                outcome[0] = work()
+            except Exception as e:
+                outcome[1] = e
+
+        # The Tk thread polls for completion instead of the worker calling root.after,
+        # which raises if the main loop isn't running yet (startup) or any more (teardown)
+        def poll():
+            if thread.is_alive():
+                self.root.after(100, poll)
+            else:
+                finish(*outcome)
+
+        thread = threading.Thread(target=worker, daemon=True)
+        self._scan_thread = thread
+        thread.start()
+        self.root.after(100, poll)
 
     def run_auto_scan(self, show_message=False):
         if not self.config.get("auto_scan_enabled", False) and not show_message:
             return
 
         scan_folders = self.config.get("scan_folders", {})
-        scanned_any = False
-
-        for folder in scan_folders.get("mkv", []):
-            if os.path.isdir(folder):
-                self.generator.set_directories(folder)
-                if self.generator.create_mkv_playlists():
-                    scan_and_log_files(folder, (".mkv", ".mp4", ".avi"), HISTORY_VIDEO)
-                    scanned_any = True
-
-        for folder in scan_folders.get("mp4", []):
-            if os.path.isdir(folder):
-                if create_mp4_playlists(folder, PLAYLIST_FOLDER):
-                    scanned_any = True
-
-        for folder in scan_folders.get("pdf", []):
-            if os.path.isdir(folder):
-                if scan_and_log_files(folder, (".pdf",), PDF_HISTORY_FILE):
-                    scanned_any = True
-
-        for folder in scan_folders.get("music", []):
-            if os.path.isdir(folder):
-                if create_music_playlists(folder, PLAYLIST_FOLDER):
-                    scan_and_log_files(folder, (".aif", ".aiff"), HISTORY_AUDIO)
-                    scanned_any = True
-
-        if show_message:
+
+        def scan_mkv(folder):
+            # Each task gets its own generator; self.generator is shared with the menu commands
+            generator = MKVPlaylistGenerator()
+            generator.set_directories(folder)
+            if generator.create_mkv_playlists():
+                scan_and_log_files(folder, (".mkv", ".mp4", ".avi"), HISTORY_VIDEO)
+                return True
+            return False
+
+        def scan_mp4(folder):
+            return create_mp4_playlists(folder, PLAYLIST_FOLDER)
+
+        def scan_pdf(folder):
+            return scan_and_log_files(folder, (".pdf",), PDF_HISTORY_FILE)
+
+        def scan_music(folder):
+            if create_music_playlists(folder, PLAYLIST_FOLDER):
+                scan_and_log_files(folder, (".aif", ".aiff"), HISTORY_AUDIO)
+                return True
+            return False
+
+        def work():
+            tasks = [(scan, folder)
+                     for key, scan in (("mkv", scan_mkv), ("mp4", scan_mp4), ("pdf", scan_pdf), ("music", scan_music))
+                     for folder in scan_folders.get(key, [])
+                     if os.path.isdir(folder)]
+            if not tasks:
+                return False
+
+            # Folder scans are independent and I/O bound, so run them side by side
+            with ThreadPoolExecutor(max_workers=min(8, len(tasks))) as executor:
+                results = list(executor.map(lambda task: task[0](task[1]), tasks))
+            return any(results)
+
+        def done(scanned_any):
             if scanned_any:
-                messagebox.showinfo("Auto-Scan Complete", "All configured folders have been scanned.")
-            else:
-                messagebox.showinfo("Auto-Scan", "No folders configured or no new files found.")
+                self.refresh_library()
+            if show_message:
+                if scanned_any:
+                    messagebox.showinfo("Auto-Scan Complete", "All configured folders have been scanned.")
+                else:
+                    messagebox.showinfo("Auto-Scan", "No folders configured or no new files found.")
+
+        self.run_in_background(work, done, "Auto-scanning configured folders...")
 
     def scan_folder(self):
         folder = filedialog.askdirectory(title="Select folder to scan for MKVs")
         if not folder:
             return
 
-        self.generator.set_directories(folder)
-        if self.generator.create_mkv_playlists():
-            scan_and_log_files(folder, (".mkv", ".mp4", ".avi"), HISTORY_VIDEO)
-            messagebox.showinfo("Scan Complete", "MKV playlists and video history updated.")
+        def work():
+            self.generator.set_directories(folder)
+            if self.generator.create_mkv_playlists():
+                scan_and_log_files(folder, (".mkv", ".mp4", ".avi"), HISTORY_VIDEO)
+                return True
+            return False
+
+        def done(found):
+            if found:
+                messagebox.showinfo("Scan Complete", "MKV playlists and video history updated.")
+
+        self.run_in_background(work, done, "Scanning for MKVs...")
 
     def scan_mp4_folder(self):
         folder = filedialog.askdirectory(title="Select folder to scan for MP4s")
         if not folder:
             return
 
-        if create_mp4_playlists(folder, PLAYLIST_FOLDER):
-            messagebox.showinfo("Scan Complete", "MP4 playlists created in playlists folder.")
-        else:
-            messagebox.showinfo("No MP4s Found", "No MP4 files found in the selected folder.")
+        def done(found):
+            if found:
+                messagebox.showinfo("Scan Complete", "MP4 playlists created in playlists folder.")
+            else:
+                messagebox.showinfo("No MP4s Found", "No MP4 files found in the selected folder.")
+
+        self.run_in_background(lambda: create_mp4_playlists(folder, PLAYLIST_FOLDER), done, "Scanning for MP4s...")
 
     def scan_music_folder(self):
         folder = filedialog.askdirectory(title="Select folder to scan for Music (aif/aiff)")
         if not folder:
             return
 
-        if create_music_playlists(folder, PLAYLIST_FOLDER):
-            scan_and_log_files(folder, (".aif", ".aiff"), HISTORY_AUDIO)
-            messagebox.showinfo("Scan Complete", "Music playlists created and audio history updated.")
-        else:
-            messagebox.showinfo("Scan Failed", "No AIF/AIFF files found.")
+        def work():
+            if create_music_playlists(folder, PLAYLIST_FOLDER):
+                scan_and_log_files(folder, (".aif", ".aiff"), HISTORY_AUDIO)
+                return True
+            return False
+
+        def done(found):
+            if found:
+                messagebox.showinfo("Scan Complete", "Music playlists created and audio history updated.")
+            else:
+                messagebox.showinfo("Scan Failed", "No AIF/AIFF files found.")
+
+        self.run_in_background(work, done, "Scanning for music...")
 
     def scan_pdfs(self):
         folder = filedialog.askdirectory(title="Select folder to scan for PDFs")
         if not folder:
             return
 
-        found = scan_and_log_files(folder, (".pdf",), PDF_HISTORY_FILE)
-        if found:
-            messagebox.showinfo("Scan Complete", "PDF history updated with scanned files.")
-        else:
-            messagebox.showinfo("No PDFs Found", "No new PDFs found in the selected folder.")
+        def done(found):
+            if found:
+                messagebox.showinfo("Scan Complete", "PDF history updated with scanned files.")
+            else:
+                messagebox.showinfo("No PDFs Found", "No new PDFs found in the selected folder.")
+
+        self.run_in_background(lambda: scan_and_log_files(folder, (".pdf",), PDF_HISTORY_FILE), done, "Scanning for PDFs...")
 
     def search_event(self, event):
         self.search()
@@ -2345,123 +2928,260 @@ class MKVPlayerApp:
         self.entry.delete(0, tk.END)
 
     def refresh_library(self):
-        self.all_media_items = []
+        """Rebuild the library on a worker thread; a request made mid-refresh reruns once it lands."""
+        if self._refresh_thread is not None:
+            self._refresh_pending = True
+            return
+        self._refresh_pending = False
 
-        for f in os.listdir(PLAYLIST_FOLDER):
-            if f.endswith(".m3u") and f not in ("history.m3u", "history2.m3u"):
-                playlist_path = os.path.join(PLAYLIST_FOLDER, f)
-                name = os.path.splitext(f)[0]
-                media_path = ""
-                media_type = "Video"
+        result = [None]
+
+        def worker():
+            try:
+                result[0] = self.collect_media_items()
+            except Exception as e:
+                print(f"Failed to refresh library: {e}")
+
+        # As in run_in_background, the Tk thread polls for the result: the worker never
+        # calls Tk, so a refresh that finishes before mainloop starts is not lost
+        def poll():
+            if thread.is_alive():
+                self.root.after(100, poll)
+            else:
+                self.apply_media_items(result[0])
+
+        thread = threading.Thread(target=worker, daemon=True)
+        self._refresh_thread = thread
+        thread.start()
+        self.root.after(100, poll)
+
+    def start_library_watch(self):
+        """Refresh the library when playlists change on disk, if watchdog is installed."""
+        if not WATCHDOG_AVAILABLE:
+            return
+        try:
+            observer = Observer()
+            observer.daemon = True
+            observer.schedule(LibraryWatchHandler(self.on_library_changed), PLAYLIST_FOLDER, recursive=False)
+            observer.start()
+        except Exception as e:
+            print(f"Could not watch {PLAYLIST_FOLDER}: {e}")
+            return
+        self.root.after(200, self.drain_library_events)
+
+    def on_library_changed(self):
+        # Called on the watchdog thread: only queue the event, the Tk thread drains it
+        self._library_events.put(None)
+
+    def drain_library_events(self):
+        changed = False
+        while True:
+            try:
+                self._library_events.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+        if changed:
+            self.schedule_library_refresh()
+        self.root.after(200, self.drain_library_events)
+
+    def schedule_library_refresh(self):
+        """Coalesce a burst of file events (e.g. a scan writing many playlists) into one refresh."""
+        if self._watch_after is not None:
+            self.root.after_cancel(self._watch_after)
+        self._watch_after = self.root.after(200, self.run_library_refresh)
+
+    def run_library_refresh(self):
+        self._watch_after = None
+        self.refresh_library()
 
+    def collect_media_items(self):
+        """Read playlists and PDF history into media item dicts. Does no Tk calls, so it can run off the main thread."""
+        items = []
+        meta = load_playlist_meta()
+        fresh = {}
+
+        with os.scandir(PLAYLIST_FOLDER) as entries:
+            for entry in entries:
+                f = entry.name
+                if not f.endswith(".m3u") or f in ("history.m3u", "history2.m3u"):
+                    continue
                 try:
-                    with open(playlist_path, "r", encoding="utf-8") as pf:
-                        for line in pf:
-                            line = line.strip()
-                            if line.startswith("file:///"):
-                                media_path = urllib.parse.unquote(line[8:])
-                                ext = os.path.splitext(media_path)[1].lower()
-                                if ext == ".mkv":
-                                    media_type = "MKV"
-                                elif ext == ".mp4":
-                                    media_type = "MP4"
-                                elif ext == ".avi":
-                                    media_type = "AVI"
-                                elif ext in (".aif", ".aiff"):
-                                    media_type = "Music"
-                                break
-                            elif line and not line.startswith("#"):
-                                media_path = line
-                                break
-                except:
-                    pass
-
-                artist = ""
-                album = ""
-                if media_type == "Music" and media_path:
-                    try:
-                        path_parts = os.path.normpath(media_path).split(os.sep)
-                        if len(path_parts) >= 3:
-                            album = path_parts[-2]
-                            artist = path_parts[-3]
-                    except IndexError:
-                        pass
-
-                self.all_media_items.append({
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                    key = [st.st_mtime_ns, st.st_size]
+                except OSError:
+                    key = None
+
+                cached = meta.get(f)
+                if key is not None and cached and cached[:2] == key:
+                    info = cached[2:]
+                else:
+                    info = list(parse_playlist_media(entry.path))
+                if key is not None:
+                    fresh[f] = key + info
+                media_path, media_type, artist, album = info
+
+                name = os.path.splitext(f)[0]
+                items.append({
                     "name": name,
                     "type": media_type,
                     "path": media_path,
-                    "playlist": playlist_path,
+                    "playlist": entry.path,
                     "artist": artist,
-                    "album": album
+                    "album": album,
+                    "name_l": name.lower(),
+                    "type_l": media_type.lower(),
+                    "path_l": media_path.lower(),
+                    "album_l": album.lower(),
+                    "artist_l": artist.lower()
                 })
 
+        if fresh != meta:
+            save_playlist_meta(fresh)
+
         if os.path.exists(PDF_HISTORY_FILE):
             try:
-                with open(PDF_HISTORY_FILE, "r", encoding="utf-8") as f:
-                    for line in f:
-                        pdf_path = line.strip()
-                        if pdf_path and os.path.exists(pdf_path):
-                            self.all_media_items.append({
-                                "name": os.path.splitext(os.path.basename(pdf_path))[0],
+                with open(PDF_HISTORY_FILE, "r", encoding="utf-8", errors="replace") as f:
+                    pdf_paths = f.read().splitlines()
+                listings = {}
+                for pdf_path in map(str.strip, pdf_paths):
+                    if pdf_path:
+                        folder, base = os.path.split(pdf_path)
+                        names = listings.get(folder)
+                        if names is None:
+                            names = listings[folder] = list_dir_names(folder)
+                        if base in names:
+                            name = os.path.splitext(base)[0]
+                            items.append({
+                                "name": name,
                                 "type": "PDF",
                                 "path": pdf_path,
                                 "playlist": None,
                                 "artist": "",
-                                "album": ""
+                                "album": "",
+                                "name_l": name.lower(),
+                                "type_l": "pdf",
+                                "path_l": pdf_path.lower(),
+                                "album_l": "",
+                                "artist_l": ""
                             })
-            except:
+            except OSError:
                 pass
 
-        self.populate_tree(self.all_media_items)
+        return items
+
+    def apply_media_items(self, items):
+        self._refresh_thread = None
+        if items is None and self._showing_cached_library:
+            # Don't let last run's list pass for the current one
+            self.status_var.set(f"{len(self.all_media_items)} items (cached; library refresh failed)")
+        elif items is not None:
+            self._showing_cached_library = False
+        # Leave the tree, and whatever the user has filtered or selected, alone if nothing changed
+        if items is not None and items != self.all_media_items:
+            self._library_dirty = True
+            self.all_media_items = items
+            # First playlist item wins for a repeated name, as the old linear search did
+            self._by_name = {item["name"]: item for item in reversed(items) if item["playlist"]}
+            self.index_search_columns()
+            # Refreshes land on their own (startup, file watcher), so keep the current search applied
+            self.filter_library()
+        if self._refresh_pending:
+            self.refresh_library()
+
+    def save_library_on_exit(self):
+        """atexit hook: keep the library for the next start, if it changed this run."""
+        if self._library_dirty:
+            save_library_cache(self.all_media_items)
+
+    def index_search_columns(self):
+        """Rebuild the name/album/artist columns that filter_library scores from all_media_items."""
+        items = self.all_media_items
+        self._search_columns = (
+            length_sorted_column([item["name_l"] for item in items]),
+            length_sorted_column([item["album_l"] for item in items]),
+            length_sorted_column([item["artist_l"] for item in items]),
+        )
 
     def populate_tree(self, items):
-        self.tree.delete(*self.tree.get_children())
-        for item in items:
-            self.tree.insert("", tk.END, values=(item["name"], item["type"], item["path"]))
-        self.status_var.set(f"{len(items)} items")
+        """Show items in the tree: the first TREE_BATCH_SIZE rows at once, the rest in idle-time batches."""
+        if self._populate_after is not None:
+            self.root.after_cancel(self._populate_after)
+            self._populate_after = None
+
+        # Take the tree off screen and mute its scrollbars so Tk lays it out once, not per row
+        yscroll = self.tree.cget("yscrollcommand")
+        xscroll = self.tree.cget("xscrollcommand")
+        self.tree.grid_remove()
+        self.tree.configure(yscrollcommand="", xscrollcommand="")
+        try:
+            self.tree.delete(*self.tree.get_children())
+            pending = iter(items)
+            self.insert_tree_batch(pending)
+        finally:
+            self.tree.configure(yscrollcommand=yscroll, xscrollcommand=xscroll)
+            self.tree.grid()
+        self._populate_after = self.root.after_idle(self.flush_tree_batches, pending, len(items))
+
+    def insert_tree_batch(self, pending):
+        """Insert up to TREE_BATCH_SIZE rows from the pending iterator; return how many were inserted."""
+        insert = self.tree.insert
+        count = 0
+        for item in pending:
+            insert("", tk.END, values=(item["name"], item["type"], item["path"]))
+            count += 1
+            if count == TREE_BATCH_SIZE:
+                break
+        return count
+
+    def flush_tree_batches(self, pending, total):
+        # Batches run from after_idle, so Tk repaints and handles input between them
+        self._populate_after = None
+        if self.insert_tree_batch(pending) == TREE_BATCH_SIZE:
+            self._populate_after = self.root.after_idle(self.flush_tree_batches, pending, total)
+        else:
+            self.status_var.set(f"{total} items")
+
+    def schedule_filter(self, event=None):
+        """Filter once typing pauses for 150 ms instead of on every keystroke."""
+        if self._filter_after is not None:
+            self.root.after_cancel(self._filter_after)
+        self._filter_after = self.root.after(150, self.filter_library)
 
     def filter_library(self, event=None):
+        self._filter_after = None
         query = self.entry.get().strip().lower()
         if not query:
             self.populate_tree(self.all_media_items)
         else:
             parts = [p.strip() for p in query.split(',')]
-            filtered_items = []
             SCORE_THRESHOLD = 70  # Adjust for desired fuzziness (0-100)
+            names_l, albums_l, artists_l = self._search_columns
+
+            def matches(q, column):
+                return ratio_hits(q, column, SCORE_THRESHOLD)
 
             if len(parts) == 1:
                 # Search for "song title", "album title", or "artist title"
                 term = parts[0]
-                for item in self.all_media_items:
-                    scores = [
-                        process.fuzz.ratio(term, item.get("name", "").lower()),
-                        process.fuzz.ratio(term, item.get("album", "").lower()),
-                        process.fuzz.ratio(term, item.get("artist", "").lower())
-                    ]
-                    if any(score >= SCORE_THRESHOLD for score in scores):
-                        filtered_items.append(item)
+                hits = matches(term, names_l) | matches(term, albums_l) | matches(term, artists_l)
 
             elif len(parts) == 2:
                 # Search for "album title, artist title"
                 album_q, artist_q = parts[0], parts[1]
-                for item in self.all_media_items:
-                    if item.get('album') and item.get('artist'):
-                        album_score = process.fuzz.ratio(album_q, item['album'].lower())
-                        artist_score = process.fuzz.ratio(artist_q, item['artist'].lower())
-                        if album_score >= SCORE_THRESHOLD and artist_score >= SCORE_THRESHOLD:
-                            filtered_items.append(item)
+                hits = matches(album_q, albums_l) & matches(artist_q, artists_l)
 
             elif len(parts) == 3:
                 # Search for "song title, album title, artist title"
                 song_q, album_q, artist_q = parts[0], parts[1], parts[2]
-                for item in self.all_media_items:
-                    if item.get('name') and item.get('album') and item.get('artist'):
-                        song_score = process.fuzz.ratio(song_q, item['name'].lower())
-                        album_score = process.fuzz.ratio(album_q, item['album'].lower())
-                        artist_score = process.fuzz.ratio(artist_q, item['artist'].lower())
-                        if song_score >= SCORE_THRESHOLD and album_score >= SCORE_THRESHOLD and artist_score >= SCORE_THRESHOLD:
-                            filtered_items.append(item)
+                hits = matches(song_q, names_l) & matches(album_q, albums_l) & matches(artist_q, artists_l)
+
+            else:
+                hits = ()
+
+            filtered_items = [self.all_media_items[idx] for idx in sorted(hits)]
 
             self.populate_tree(filtered_items)
 
@@ -2472,7 +3192,9 @@ class MKVPlayerApp:
             self.sort_col = col
             self.sort_reverse = False
 
-        self.all_media_items.sort(key=lambda x: x[col].lower(), reverse=self.sort_reverse)
+        # Sort keys are lower-cased once per refresh, so sorting is a plain itemgetter
+        self.all_media_items.sort(key=operator.itemgetter(col + "_l"), reverse=self.sort_reverse)
+        self.index_search_columns()
         self.filter_library()
 
     def play_selected(self):
@@ -2491,13 +3213,13 @@ class MKVPlayerApp:
             else:
                 messagebox.showwarning("File Not Found", f"PDF file not found:\n{path}")
         else:
-            for media_item in self.all_media_items:
-                if media_item["name"] == name and media_item["playlist"]:
-                    try:
-                        launch_vlc(media_item["playlist"])
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to play:\n{e}")
-                    return
+            media_item = self._by_name.get(name)
+            if media_item is not None:
+                try:
+                    launch_vlc(media_item["playlist"])
+                except Exception as e:
+                    messagebox.showerror("Error", f"Failed to play:\n{e}")
+                return
             if os.path.exists(path):
                 try:
                     launch_vlc(path)
@@ -2529,15 +3251,79 @@ class MKVPlayerApp:
         self.root.update_idletasks()
 
         self.root.after(10, lambda: self.load_thumbnail(path, media_type))
+        self.prefetch_neighbors(selection[0])
+
+    def prefetch_neighbors(self, iid):
+        """Queue the rows around iid for thumbnail prefetching, dropping any older requests."""
+        jobs = []
+        prev_iid = next_iid = iid
+        for _ in range(THUMB_PREFETCH_NEIGHBORS):
+            next_iid = next_iid and self.tree.next(next_iid)
+            prev_iid = prev_iid and self.tree.prev(prev_iid)
+            for neighbor in (next_iid, prev_iid):
+                if neighbor:
+                    values = self.tree.item(neighbor, "values")
+                    jobs.append((values[2], values[1]))
+
+        self._prefetch_generation += 1
+        for path, media_type in jobs:
+            self._prefetch_queue.put((self._prefetch_generation, path, media_type))
+
+        if self._prefetch_thread is None:
+            self._prefetch_thread = threading.Thread(target=self.prefetch_worker, daemon=True)
+            self._prefetch_thread.start()
+
+    def prefetch_worker(self):
+        """Render and decode queued thumbnails into self._prefetched. Never touches Tk."""
+        while True:
+            generation, path, media_type = self._prefetch_queue.get()
+            if generation != self._prefetch_generation:
+                continue
+            try:
+                thumb_path = get_thumbnail(path, media_type)
+                if not thumb_path:
+                    continue
+                st = os.stat(thumb_path)
+                key = (thumb_path, st.st_mtime_ns, st.st_size)
+                if key in self._thumb_cache or key in self._prefetched:
+                    continue
+                img = Image.open(thumb_path)
+                img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+            except Exception:
+                continue
+            with self._prefetch_lock:
+                self._prefetched[key] = img
+                if len(self._prefetched) > THUMB_CACHE_MAX:
+                    self._prefetched.popitem(last=False)
 
     def load_thumbnail(self, path, media_type):
         thumb_path = get_thumbnail(path, media_type)
 
-        if thumb_path and os.path.exists(thumb_path):
+        st = None
+        if thumb_path:
             try:
-                img = Image.open(thumb_path)
-                img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
-                self.current_thumbnail = ImageTk.PhotoImage(img)
+                st = os.stat(thumb_path)
+            except OSError:
+                pass
+
+        if st is not None:
+            try:
+                # Keyed on the file's stat, so a regenerated thumbnail is decoded afresh
+                key = (thumb_path, st.st_mtime_ns, st.st_size)
+                photo = self._thumb_cache.get(key)
+                if photo is None:
+                    with self._prefetch_lock:
+                        img = self._prefetched.pop(key, None)
+                    if img is None:
+                        img = Image.open(thumb_path)
+                        img.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+                    photo = ImageTk.PhotoImage(img)
+                    self._thumb_cache[key] = photo
+                    if len(self._thumb_cache) > THUMB_CACHE_MAX:
+                        self._thumb_cache.popitem(last=False)
+                else:
+                    self._thumb_cache.move_to_end(key)
+                self.current_thumbnail = photo
                 self.thumbnail_label.config(image=self.current_thumbnail, text="")
                 self.preview_status.config(text="")
             except Exception as e:
@@ -2545,7 +3331,7 @@ class MKVPlayerApp:
                 self.preview_status.config(text=str(e)[:30])
         else:
             self.thumbnail_label.config(image="", text="No thumbnail\navailable")
-            if media_type in ("MKV", "MP4", "AVI", "Video"):
+            if media_type in VIDEO_TYPES:
                 self.preview_status.config(text="ffmpeg required")
             elif media_type == "PDF":
                 self.preview_status.config(text="pdftoppm required")